@@ -37,11 +37,30 @@ connect_wifi('Reza', '-------')
 # --------------------------------------------------Key generate functions start---------------------------------------------#
 import urequests
 import json
+# sntp.py of Python - ESP/PPE, copied next to this script: SNTP first, the HTTP API is only the fallback
+import sntp
+rtc_synced = False
 
+
+# RTC time once synced, else SNTP, else the HTTP API
 def get_unix_time():
+    global rtc_synced
+    if rtc_synced:
+        return sntp.rtc_unix_time()
+
+    try:
+        unix_time = sntp.query()
+    except OSError:
+        return get_http_time()
+    rtc_synced = sntp.set_rtc(unix_time)
+    return unix_time
+
+
+# Fallback time source: the HTTP API
+def get_http_time():
     try:
         # Fetch the JSON response from the API
-        response = urequests.get("http://ip-api.com/json/?fields=status,message,timezone,offset")
+        response = urequests.get("http://future.izino.ir/index.php")
         
         # Debugging: Print the raw response
         #print("Raw Response:", response.text)
@@ -54,7 +73,7 @@ def get_unix_time():
                 #print("Parsed JSON:", data)
                 
                 # Extract the Unix time
-                unix_time = data.get('offset', 'N/A')
+                unix_time = data.get('unixtime', 'N/A')
             except ValueError:
                 #print("Error: Invalid JSON response")
                 unix_time = 'N/A'
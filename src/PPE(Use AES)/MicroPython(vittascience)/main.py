@@ -43,17 +43,35 @@ connect_wifi('Reza', '---------')
 # --------------------------------------------------Key generate functions start---------------------------------------------#
 import urequests
 import json
+# sntp.py of Python - ESP/PPE, copied next to this script: SNTP first, the HTTP API is only the fallback
+import sntp
+rtc_synced = False
 
 
+# RTC time once synced, else SNTP, else the HTTP API
 def get_unix_time():
+    global rtc_synced
+    if rtc_synced:
+        return sntp.rtc_unix_time()
+
+    try:
+        unix_time = sntp.query()
+    except OSError:
+        return get_http_time()
+    rtc_synced = sntp.set_rtc(unix_time)
+    return unix_time
+
+
+# Fallback time source: the HTTP API
+def get_http_time():
     # Fetch the JSON response from the API
-    response = urequests.get("http://ip-api.com/json/?fields=status,message,timezone,offset")
+    response = urequests.get("http://future.izino.ir/index.php")
     # response = urequests.get("https://www.allmypages.ir/unix.php")
 
     if response.status_code == 200:
         data = response.json()
         # Extract the Unix time
-        unix_time = data.get('offset', 'N/A')
+        unix_time = data.get('unixtime', 'N/A')
 
     response.close()
 
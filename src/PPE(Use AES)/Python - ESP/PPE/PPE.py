@@ -1,15 +1,29 @@
-import mip
-import network
 import time
 
+# No network module on the unix port, where the PPE functions (and ppe_bench) run without Wi-Fi
+try:
+    import network
+except ImportError:
+    network = None
+
+# import mip
 # mip.install('cryptolib')
 import ucryptolib
 import ubinascii
 import _thread
+import gc
+
+import bufpool
+import sntp
+from timecache import TimeCache
 
-# Get global variables
-results = {'Left_Cipher': None, 'Right_Cipher': None, 'Left_Text': None, 'Right_Text': None}
-lock = _thread.allocate_lock()
+# Job queue of the long-lived worker thread, job_posted is released to wake it up
+jobs = []
+jobs_lock = _thread.allocate_lock()
+job_posted = _thread.allocate_lock()
+job_posted.acquire()
+worker_awake = False
+worker_started = False
 
 
 # --------------------------------------------------WIFI and board functions start---------------------------------------------#
@@ -34,18 +48,47 @@ def connect_wifi(ssid, password):
         print('Failed to connect')
 
 
-# فراخوانی تابع با استفاده از SSID و رمز عبور شبکه
-connect_wifi('Reza', '@Key123456')
+# Network used for time syncs. Wi-Fi is only brought up when the time cache needs one,
+# a node waking from deep sleep with a valid cache encrypts without it.
+WIFI_SSID = 'Reza'
+WIFI_PASSWORD = '@Key123456'
+
+
+def ensure_wifi():
+    if network is None:
+        return
+    if not network.WLAN(network.STA_IF).isconnected():
+        connect_wifi(WIFI_SSID, WIFI_PASSWORD)
 
 # --------------------------------------------------WIFI and board functions end---------------------------------------------#
 
 
 # --------------------------------------------------Key generate functions start---------------------------------------------#
-import urequests
+# Only the HTTP fallback needs it, the unix port may not have it
+try:
+    import urequests
+except ImportError:
+    urequests = None
 import json
 
 
-def get_unix_time():
+# Unix time and key epoch of the last sync, in RTC memory so they survive deep sleep
+time_cache = TimeCache()
+
+
+# SNTP first (it also sets the RTC), the HTTP API when no NTP server answers
+def fetch_unix_time():
+    ensure_wifi()
+
+    try:
+        return sntp.sync()
+    except OSError as e:
+        sntp_error = e
+
+    # No HTTP client on this port (the unix port without urequests), nothing else to ask
+    if urequests is None:
+        raise OSError("no SNTP reply (%s) and no urequests for the HTTP fallback" % sntp_error)
+
     # Fetch the JSON response from the API
     #response = urequests.get("https://worldtimeapi.org/api/timezone/asia/tehran")
     response = urequests.get("http://future.izino.ir/index.php")
@@ -60,14 +103,34 @@ def get_unix_time():
     return unix_time
 
 
-# Get generate key from unixtime
-def get_current_time_key(salt):
-    keybase = ""
-    key = ""
+# Unix time off the RTC while the time cache is valid, fetched (and cached) otherwise
+def get_unix_time():
+    unix_time = time_cache.now()
+    if unix_time is None:
+        unix_time = fetch_unix_time()
+        time_cache.synced(unix_time)
+    return unix_time
+
 
+# Get generate key from unixtime
+def get_current_time_key(salt, timestep=None):
     # Simulate the TimeStep.GetTimeStep() method
-    timestep = int(get_unix_time())
+    if timestep is None:
+        timestep = int(get_unix_time())
     timestep8 = str(timestep)[:8]
+    cached = time_cache.key(salt, timestep8)
+    if cached is not None:
+        return cached
+
+    result = derive_time_key(salt, timestep8)
+    time_cache.store_key(salt, timestep8, result)
+    return result
+
+
+# Key of salt for the 8 digit epoch timestep8, derived without touching the time cache
+def derive_time_key(salt, timestep8):
+    keybase = ""
+    key = ""
     timestep8char = list(timestep8)
 
     # Get keybase first 8 numbers
@@ -139,49 +202,19 @@ def get_key2(key_str):
 # --------------------------------------------------Key generate functions end---------------------------------------------#
 
 
-# --------------------------------------------------Other functions start---------------------------------------------#
-
-def remove_x10_from_string(input_str):
-    # Convert string to bytes
-    byte_data = input_str.encode('utf-8')
-
-    print(byte_data)
-
-    # Remove all occurrences of \x
-    cleaned_byte_data = byte_data.replace(b'\x01', b'')
-    cleaned_byte_data = cleaned_byte_data.replace(b'\x02', b'')
-    cleaned_byte_data = cleaned_byte_data.replace(b'\x03', b'')
-    cleaned_byte_data = cleaned_byte_data.replace(b'\x04', b'')
-    cleaned_byte_data = cleaned_byte_data.replace(b'\x05', b'')
-    cleaned_byte_data = cleaned_byte_data.replace(b'\x06', b'')
-    cleaned_byte_data = cleaned_byte_data.replace(b'\x07', b'')
-    cleaned_byte_data = cleaned_byte_data.replace(b'\x08', b'')
-    cleaned_byte_data = cleaned_byte_data.replace(b'\x09', b'')
-    cleaned_byte_data = cleaned_byte_data.replace(b'\x10', b'')
-    cleaned_byte_data = cleaned_byte_data.replace(b'\x0a', b'')
-    cleaned_byte_data = cleaned_byte_data.replace(b'\x0b', b'')
-    cleaned_byte_data = cleaned_byte_data.replace(b'\x0c', b'')
-    cleaned_byte_data = cleaned_byte_data.replace(b'\x0d', b'')
-    cleaned_byte_data = cleaned_byte_data.replace(b'\x0e', b'')
-    cleaned_byte_data = cleaned_byte_data.replace(b'\x0f', b'')
-
-    # Convert bytes back to string
-    cleaned_str = cleaned_byte_data.decode('utf-8')
-
-    return cleaned_str
-
-
-# --------------------------------------------------Other functions end---------------------------------------------#
-
-
 # --------------------------------------------------Single Process encryption/decryption functions start---------------------------------------------#
-def pad(s):
-    pad_len = 16 - len(s) % 16
-    return s + (chr(pad_len) * pad_len)
+# PKCS#7 on bytes
+def pad(data):
+    pad_len = 16 - len(data) % 16
+    return data + bytes([pad_len]) * pad_len
 
 
-def unpad(s):
-    return s[:-ord(s[-1])]
+# Only the last byte is read, one slice is the only copy
+def unpad(data):
+    pad_len = data[-1]
+    if pad_len < 1 or pad_len > 16 or pad_len > len(data):
+        raise ValueError("Padding is incorrect.")
+    return data[:-pad_len]
 
 
 def single_core_encrypt(data, key_str):
@@ -192,112 +225,232 @@ def single_core_encrypt(data, key_str):
     aes = ucryptolib.aes(key, 1)
 
     # get encrypt
-    plaintext = pad(data)
-    ciphertext = aes.encrypt(plaintext.encode('utf-8'))
+    plaintext = pad(data.encode('utf-8'))
+    ciphertext = aes.encrypt(plaintext)
     encoded_ciphertext = ubinascii.b2a_base64(ciphertext).decode('utf-8')
     return encoded_ciphertext
 
 
-def single_core_decrypt(enc_data, key_str):
+# Decrypt one base64 segment to unpadded bytes
+def decrypt_segment(enc_data, key_str):
     byte_data = key_str[0:16]
     key = byte_data.decode('latin-1')
 
     # initilize AES (ECB)
     aes = ucryptolib.aes(key, 1)
 
-    decoded_ciphertext = ubinascii.a2b_base64(enc_data.encode('utf-8'))
-    aes = ucryptolib.aes(key, 1)
-    decrypted = aes.decrypt(decoded_ciphertext).decode('utf-8')
-    return decrypted.strip()
-
-
-# --------------------------------------------------Single Process encryption/decryption functions end---------------------------------------------#
-
+    decoded_ciphertext = ubinascii.a2b_base64(enc_data)
+    return unpad(aes.decrypt(decoded_ciphertext))
 
-# --------------------------------------------------Multi Process encryption/decryption functions start---------------------------------------------#
 
-def encrypt_left(data, key):
-    global result
-    result = single_core_encrypt(data, key)
-    with lock:
-        results['Left_Cipher'] = result
+def single_core_decrypt(enc_data, key_str):
+    return decrypt_segment(enc_data, key_str).decode('utf-8')
+
+
+# Pad a half into a pooled buffer and encrypt it there in place, returns its base64 (newline ended bytes)
+def encrypt_half(data, key_str):
+    size = len(data) + 16 - len(data) % 16
+    buf = bufpool.halves.take(size)
+    view = memoryview(buf)
+    view[:len(data)] = data
+    for i in range(len(data), size):
+        buf[i] = size - len(data)
+
+    try:
+        aes = ucryptolib.aes(key_str[0:16].decode('latin-1'), 1)
+        aes.encrypt(view[:size], view[:size])
+        return ubinascii.b2a_base64(view[:size])
+    finally:
+        bufpool.halves.give(buf)
+
+
+# Decrypt a base64 half into a pooled buffer, returns (buffer, plaintext length)
+def decrypt_half(enc_data, key_str):
+    ct = ubinascii.a2b_base64(enc_data)
+    if len(ct) == 0 or len(ct) % 16:
+        raise ValueError("Data must be padded to 16 byte boundary in ECB mode")
+    buf = bufpool.halves.take(len(ct))
+
+    # The buffer only leaves with the result, a failed half gives it back
+    try:
+        aes = ucryptolib.aes(key_str[0:16].decode('latin-1'), 1)
+        aes.decrypt(ct, memoryview(buf)[:len(ct)])
+        pad_len = buf[len(ct) - 1]
+        if pad_len < 1 or pad_len > 16:
+            raise ValueError("Padding is incorrect.")
+    except Exception:
+        bufpool.halves.give(buf)
+        raise
+    return buf, len(ct) - pad_len
 
 
-def encrypt_right(data, key):
-    global result
-    result = single_core_encrypt(data, key)
-    with lock:
-        results['Right_Cipher'] = result
+# --------------------------------------------------Single Process encryption/decryption functions end---------------------------------------------#
 
 
-# Multi core encryption function
-def multi_core_encrypt(data, key_str):
-    global result
+# --------------------------------------------------Multi Process encryption/decryption functions start---------------------------------------------#
 
-    # Calculate the midpoint of the string
+# One PPE/PPD call: preallocated result slots of its two halves and its own completion lock.
+# Several contexts can be in flight at once, and a context can be reused once it is done.
+class PPEContext:
+    def __init__(self):
+        self.slots = [None, None]
+        self.error = None
+        self.pending = 0
+        self.join = None
+        self.lock = _thread.allocate_lock()
+        self.done = _thread.allocate_lock()
+
+    # Expect both halves, done stays held until the last one is stored (waits if the context is still busy)
+    def start(self, join):
+        self.done.acquire()
+        self.slots[0] = None
+        self.slots[1] = None
+        self.error = None
+        self.pending = 2
+        self.join = join
+
+    # Run one half into its slot, the last half to finish wakes the caller up
+    def run(self, index, func, data, key):
+        try:
+            self.slots[index] = func(data, key)
+        except Exception as e:
+            self.error = e
+        finally:
+            with self.lock:
+                self.pending -= 1
+                last = self.pending == 0
+            if last:
+                self.done.release()
+
+    # Block until both halves are stored (no polling), then join them
+    def wait(self):
+        self.done.acquire()
+        self.done.release()
+        if self.error is not None:
+            # The half that did succeed still holds a pooled (buffer, length), give it back
+            for i in range(2):
+                if isinstance(self.slots[i], tuple):
+                    bufpool.halves.give(self.slots[i][0])
+                self.slots[i] = None
+            raise self.error
+        return self.join(self.slots[0], self.slots[1])
+
+
+# Worker thread: sleeps on job_posted, then runs queued halves until the queue is empty
+def worker_loop():
+    global worker_awake
+    while True:
+        job_posted.acquire()
+        while True:
+            with jobs_lock:
+                if not jobs:
+                    worker_awake = False
+                    break
+                ctx, index, func, data, key = jobs.pop(0)
+            ctx.run(index, func, data, key)
+
+
+# Queue one half for the worker thread, started once on first use instead of a new thread per call
+def post_half(ctx, index, func, data, key):
+    global worker_started, worker_awake
+    if not worker_started:
+        _thread.start_new_thread(worker_loop, ())
+        worker_started = True
+
+    with jobs_lock:
+        jobs.append((ctx, index, func, data, key))
+        wake = not worker_awake
+        worker_awake = True
+    if wake:
+        job_posted.release()
+
+
+# "left~|~right" (without the base64 newlines) is built in a pooled buffer and base64 encoded from there
+def join_cipher(left, right):
+    left_size = len(left) - 1
+    size = left_size + 3 + len(right) - 1
+    buf = bufpool.joined.take(size)
+    try:
+        view = memoryview(buf)
+        view[:left_size] = memoryview(left)[:left_size]
+        view[left_size:left_size + 3] = b"~|~"
+        view[left_size + 3:size] = memoryview(right)[:len(right) - 1]
+        return ubinascii.b2a_base64(view[:size]).decode('utf-8')
+    finally:
+        bufpool.joined.give(buf)
+
+
+# Both halves are (pooled buffer, length), joined in a pooled buffer and decoded once
+def join_text(left, right):
+    (left_buf, left_size), (right_buf, right_size) = left, right
+    size = left_size + right_size
+    buf = bufpool.joined.take(size)
+    try:
+        view = memoryview(buf)
+        view[:left_size] = memoryview(left_buf)[:left_size]
+        view[left_size:size] = memoryview(right_buf)[:right_size]
+        bufpool.halves.give(left_buf)
+        bufpool.halves.give(right_buf)
+        left_buf = right_buf = None
+        # Invalid UTF-8 (a wrong key that still unpadded) raises here, the buffers go back all the same
+        return str(view[:size], 'utf-8')
+    finally:
+        if left_buf is not None:
+            bufpool.halves.give(left_buf)
+            bufpool.halves.give(right_buf)
+        bufpool.joined.give(buf)
+
+
+# Start encrypting data in ctx, background=True leaves both halves to the worker thread
+def begin_encrypt(ctx, data, key_str, background=False):
+    data = memoryview(data.encode('utf-8'))
+
+    # Calculate the midpoint, moved back to the start of a UTF-8 character
     midpoint = len(data) // 2
+    while 0 < midpoint < len(data) and data[midpoint] & 0xC0 == 0x80:
+        midpoint -= 1
 
-    # Divide the string into two halves
+    # Divide the data into two halves (memoryviews, nothing is copied)
     Left_Data = data[:midpoint]
     Right_Data = data[midpoint:]
 
-    # Parallel on thread start
-    _thread.start_new_thread(encrypt_left, (Left_Data, key_str))
-    _thread.start_new_thread(encrypt_right, (Right_Data, key_str))
+    ctx.start(join_cipher)
+    post_half(ctx, 1, encrypt_half, Right_Data, key_str)
+    if background:
+        post_half(ctx, 0, encrypt_half, Left_Data, key_str)
+    else:
+        ctx.run(0, encrypt_half, Left_Data, key_str)
+    return ctx
 
-    # Wait for threads to finish
-    while True:
-        with lock:
-            if results['Left_Cipher'] and results['Right_Cipher']:
-                break
-        time.sleep(1)
-    # Parallel on thread end
 
-    cipher = "%s~|~%s" % (results['Left_Cipher'], results['Right_Cipher'])
-    cipher = cipher.replace("\n", "");
-    cipher = cipher.replace("\r", "");
-    encoded_bytes = ubinascii.b2a_base64(cipher.encode('utf-8'))
-    encoded_string = encoded_bytes.decode('utf-8')
-    return encoded_string
+def begin_decrypt(ctx, data, key_str, background=False):
+    Ciphers = ubinascii.a2b_base64(data)
+    separator = Ciphers.find(b"~|~")
+    if separator < 0:
+        raise ValueError("not a PPE ciphertext")
 
+    # The two base64 halves as memoryviews, nothing is copied
+    view = memoryview(Ciphers)
+    Left_Cipher = view[:separator]
+    Right_Cipher = view[separator + 3:]
 
-def decrypt_left(data, key):
-    result = single_core_decrypt(data, key)
-    with lock:
-        results['Left_Text'] = result
+    ctx.start(join_text)
+    post_half(ctx, 1, decrypt_half, Right_Cipher, key_str)
+    if background:
+        post_half(ctx, 0, decrypt_half, Left_Cipher, key_str)
+    else:
+        ctx.run(0, decrypt_half, Left_Cipher, key_str)
+    return ctx
 
 
-def decrypt_right(data, key):
-    result = single_core_decrypt(data, key)
-    with lock:
-        results['Right_Text'] = result
+# Multi core encryption function: the worker takes the right half, this thread the left one
+def multi_core_encrypt(data, key_str, ctx=None):
+    return begin_encrypt(ctx or PPEContext(), data, key_str).wait()
 
 
 # Multi core decryption function
-def multi_core_decrypt(data, key_str):
-    Ciphers = ubinascii.a2b_base64(data).decode('utf-8')
-
-    # Ciphers_str = Ciphers.decode('utf-8')
-    main_cipher = Ciphers.split('~|~')
-
-    # Get parallel processing satrt
-    _thread.start_new_thread(decrypt_left, (main_cipher[0], key_str))
-    _thread.start_new_thread(decrypt_right, (main_cipher[1], key_str))
-
-    # Wait for threads to finish
-    while True:
-        with lock:
-            if results['Left_Text'] and results['Right_Text']:
-                break
-        time.sleep(1)
-    # Get parallel processing end
-
-    # Get trim left and right string start
-    left = remove_x10_from_string(results['Left_Text'])
-    right = remove_x10_from_string(results['Right_Text'])
-    # Get trim left and right string end
-
-    return left + right
+def multi_core_decrypt(data, key_str, ctx=None):
+    return begin_decrypt(ctx or PPEContext(), data, key_str).wait()
 
 
 # --------------------------------------------------Multi Process encryption/decryption functions end---------------------------------------------#
@@ -315,12 +468,194 @@ def PPD(inp, salt):
     return multi_core_decrypt(inp, key)
 
 
+# Pipelined PPE: encrypt the next message in the background while the previous one is sent
+#
+#   ctx = PPE_begin(message, "reza")
+#   send(previous)
+#   cipher = PPE_end(ctx)
+def PPE_begin(inp, salt, ctx=None):
+    key = ubinascii.b2a_base64(get_current_time_key(salt))
+    return begin_encrypt(ctx or PPEContext(), inp, key, background=True)
+
+
+def PPE_end(ctx):
+    return ctx.wait()
+
+
+def PPD_begin(inp, salt, ctx=None):
+    key = ubinascii.b2a_base64(get_current_time_key(salt))
+    return begin_decrypt(ctx or PPEContext(), inp, key, background=True)
+
+
+def PPD_end(ctx):
+    return ctx.wait()
+
+
 # --------------------------------------------------Main PPE functions end---------------------------------------------#
 
 
-enc1 = PPE("salam", "reza")
-dec1 = PPD(enc1, "reza")
+# --------------------------------------------------Streaming encryption start---------------------------------------------#
+
+# Plaintext bytes per frame, the README's 4 KB chunk
+STREAM_CHUNK = 4096
+
+# Same layout as PPE_stream of the Python library, so PPD_stream there decrypts it:
+#   b"PPES" + version 2 + 4 byte big-endian key epoch
+#   frames: 4 byte big-endian length + AES-ECB ciphertext of one padded chunk
+#   a zero length frame at the end
+STREAM_MAGIC = b"PPES"
+STREAM_VERSION = 2
+
+
+# The halves are encrypted in place, there is nothing to join
+def join_nothing(left, right):
+    return None
+
+
+def encrypt_blocks(view, key_str):
+    aes = ucryptolib.aes(key_str[0:16].decode('latin-1'), 1)
+    aes.encrypt(view, view)
+
+
+# Streaming PPE for payloads larger than the free heap (camera frames, log dumps):
+#
+#   stream = PPEStream("reza", uart.write)
+#   stream.feed(chunk)    # any number of times, chunks of any size
+#   stream.finish()
+#
+# Only one chunk (plus its padding) is ever held: it is encrypted in place, its two
+# block-aligned halves on both threads, and written out as a frame before more input is taken.
+# So write gets a memoryview of that reused buffer as frame data: it must send (or copy) it
+# before returning, a writer that queues it (a list, a buffering radio driver) must bytes() it.
+# The header and 4 byte length fields are handed over as bytes of their own.
+class PPEStream:
+    def __init__(self, salt, write, chunk_size=STREAM_CHUNK):
+        # Frames hold whole AES blocks, a smaller chunk would never fill one
+        if chunk_size < 16:
+            raise ValueError("chunk_size must be at least 16 bytes")
+        timestep = int(get_unix_time())
+        self.key = ubinascii.b2a_base64(get_current_time_key(salt, timestep))
+        self.write = write
+        self.chunk_size = chunk_size - chunk_size % 16
+        self.buf = bytearray(self.chunk_size + 16)
+        self.view = memoryview(self.buf)
+        self.fill = 0
+        self.total = 0
+        self.ctx = PPEContext()
+
+        epoch = int(str(timestep)[:8])
+        write(STREAM_MAGIC + bytes([STREAM_VERSION]) + self.pack_length(epoch))
+
+    def pack_length(self, value):
+        return bytes([(value >> 24) & 0xFF, (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF])
+
+    def feed(self, chunk):
+        chunk = memoryview(chunk)
+        offset = 0
+        while offset < len(chunk):
+            count = min(self.chunk_size - self.fill, len(chunk) - offset)
+            self.view[self.fill:self.fill + count] = chunk[offset:offset + count]
+            self.fill += count
+            offset += count
+            if self.fill == self.chunk_size:
+                self.flush()
+
+    # Pad, encrypt and write the buffered chunk as one frame
+    def flush(self):
+        pad_len = 16 - self.fill % 16
+        size = self.fill + pad_len
+        for i in range(self.fill, size):
+            self.buf[i] = pad_len
+
+        # ECB works block by block: both halves are encrypted in place at the same time
+        midpoint = size // 32 * 16
+        if midpoint:
+            self.ctx.start(join_nothing)
+            post_half(self.ctx, 1, encrypt_blocks, self.view[midpoint:size], self.key)
+            self.ctx.run(0, encrypt_blocks, self.view[:midpoint], self.key)
+            self.ctx.wait()
+        else:
+            encrypt_blocks(self.view[:size], self.key)
+
+        self.write(self.pack_length(size))
+        self.write(self.view[:size])
+        self.total += self.fill
+        self.fill = 0
+
+    # Write the last (partial) chunk and the end frame, returns the plaintext size
+    def finish(self):
+        if self.fill:
+            self.flush()
+        self.write(self.pack_length(0))
+        return self.total
+
+
+# --------------------------------------------------Streaming encryption end---------------------------------------------#
+
+
+# --------------------------------------------------Latency measurement start---------------------------------------------#
+
+# Average multi core encryption/decryption latency in microseconds, measured on the device
+def measure_latency(data="salam", salt="reza", runs=10):
+    key = ubinascii.b2a_base64(get_current_time_key(salt))
+    encrypt_us = 0
+    decrypt_us = 0
+
+    for _ in range(runs):
+        start = time.ticks_us()
+        enc = multi_core_encrypt(data, key)
+        middle = time.ticks_us()
+        multi_core_decrypt(enc, key)
+        end = time.ticks_us()
+
+        encrypt_us += time.ticks_diff(middle, start)
+        decrypt_us += time.ticks_diff(end, middle)
+
+    print("PPE latency (%d bytes, %d runs): encrypt %d us, decrypt %d us" % (
+        len(data), runs, encrypt_us // runs, decrypt_us // runs))
+    return encrypt_us // runs, decrypt_us // runs
+
+
+# Heap bytes allocated by one multi core decryption, from gc.mem_alloc() before and after
+# (the collector is paused in between, so garbage is counted too)
+def measure_decrypt_alloc(size=4096, salt="reza"):
+    key = ubinascii.b2a_base64(get_current_time_key(salt))
+    enc = multi_core_encrypt("x" * size, key)
+    ctx = PPEContext()
+
+    gc.collect()
+    gc.disable()
+    before = gc.mem_alloc()
+    multi_core_decrypt(enc, key, ctx)
+    after = gc.mem_alloc()
+    gc.enable()
+
+    print("PPD of %d bytes: mem_alloc %d -> %d, %d bytes allocated" % (size, before, after, after - before))
+    return after - before
+
+
+# Free heap and largest free block after every message, to watch the heap over a long run
+def measure_heap(runs=16, size=4096, salt="reza"):
+    key = ubinascii.b2a_base64(get_current_time_key(salt))
+    heap = bufpool.HeapMonitor(runs)
+    ctx = PPEContext()
+
+    for _ in range(runs):
+        multi_core_decrypt(multi_core_encrypt("x" * size, key, ctx), key, ctx)
+        heap.sample()
+    heap.report()
+
+
+# --------------------------------------------------Latency measurement end---------------------------------------------#
+
+
+if __name__ == '__main__':
+    enc1 = PPE("salam", "reza")
+    dec1 = PPD(enc1, "reza")
 
-print("Text encript is : ", enc1)
-print("Text decript is : ", dec1)
+    print("Text encript is : ", enc1)
+    print("Text decript is : ", dec1)
 
+    measure_latency()
+    measure_decrypt_alloc()
+    measure_heap()
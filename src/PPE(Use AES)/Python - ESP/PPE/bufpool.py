@@ -0,0 +1,89 @@
+import gc
+import time
+import _thread
+
+try:
+    import esp32
+except ImportError:
+    esp32 = None
+
+
+# Largest plaintext half handled without allocating (a 4 KB message is two 2 KB halves)
+MAX_CHUNK = 2048
+
+# Halves (and joined messages) in flight at once: two halves of two pipelined messages
+IN_FLIGHT = 2
+
+
+# Base64 length of size bytes, with the trailing newline of ubinascii.b2a_base64
+def b64_size(size):
+    return (size + 2) // 3 * 4 + 1
+
+
+# Fixed set of preallocated bytearrays, taken and given back instead of allocated per call.
+# A request larger than the pool buffers gets a temporary bytearray (given back to nobody).
+class BufferPool:
+    def __init__(self, size, count):
+        self.size = size
+        self.count = count
+        self.free = [bytearray(size) for _ in range(count)]
+        self.lock = _thread.allocate_lock()
+        self.misses = 0
+
+    def take(self, size):
+        if size <= self.size:
+            with self.lock:
+                if self.free:
+                    return self.free.pop()
+        self.misses += 1
+        return bytearray(size)
+
+    def give(self, buf):
+        if len(buf) == self.size:
+            with self.lock:
+                if len(self.free) < self.count:
+                    self.free.append(buf)
+
+
+# Padded half: plaintext, then ciphertext in place (AES-ECB works block by block)
+halves = None
+# Joined "left~|~right" base64 of a message, or its joined plaintext on decryption
+joined = None
+
+
+def configure_pools(max_chunk=MAX_CHUNK, in_flight=IN_FLIGHT):
+    global halves, joined
+    halves = BufferPool(max_chunk + 16, in_flight * 2)
+    joined = BufferPool(2 * b64_size(max_chunk + 16) + 3, in_flight)
+
+
+configure_pools()
+
+
+# --------------------------------------------------Heap report start---------------------------------------------#
+
+# Largest free block of the IDF data heaps (the GC heap grows into them), None off the ESP32
+def largest_free_block():
+    if esp32 is None or not hasattr(esp32, 'idf_heap_info'):
+        return None
+    return max([info[2] for info in esp32.idf_heap_info(esp32.HEAP_DATA)] or [0])
+
+
+# Ring of (ticks_ms, gc.mem_free(), largest free block) samples, to watch fragmentation over time
+class HeapMonitor:
+    def __init__(self, size=32):
+        self.samples = [None] * size
+        self.count = 0
+
+    def sample(self):
+        self.samples[self.count % len(self.samples)] = (time.ticks_ms(), gc.mem_free(), largest_free_block())
+        self.count += 1
+
+    def report(self):
+        first = max(0, self.count - len(self.samples))
+        for n in range(first, self.count):
+            ticks, free, largest = self.samples[n % len(self.samples)]
+            print("heap %8d ms  mem_free %7d  largest block %s" % (ticks, free, largest))
+        print("pool misses: halves %d, joined %d" % (halves.misses, joined.misses))
+
+# --------------------------------------------------Heap report end---------------------------------------------#
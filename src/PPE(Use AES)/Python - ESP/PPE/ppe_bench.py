@@ -0,0 +1,148 @@
+import gc
+import os
+import sys
+import time
+import ubinascii
+
+import PPE
+import sntp
+from timecache import TimeCache
+
+# PPEC(UserChaCha20)/MicroPythonProject/main.py, copied next to this file as ppec.py
+try:
+    import ppec
+except ImportError:
+    ppec = None
+
+try:
+    import machine
+except ImportError:
+    machine = None
+
+
+# On-device benchmark of PPE/PPD, single-core AES and PPEC over a sweep of payload sizes:
+#
+#   import ppe_bench; ppe_bench.run()       # on the board, CSV over the serial console
+#   micropython ppe_bench.py 16,256,4096 5   # unchanged on the unix port (CI)
+#
+# Every timed call runs with the GC disabled, so the drop of gc.mem_free() over the call is
+# all it allocated: the peak heap it needs on top of what is already in use. After a collection
+# what is left (mem_free_delta) is what the call kept. One CSV row per run, the header first:
+#
+#   case,size,run,time_us,mem_free_delta,peak_bytes,ok
+#
+# PythonSimulate/OnEsp/esp32_bench_results.py loads the captured output into the results
+# of the ESP32 comparison charts.
+SIZES = [16, 64, 256, 1024, 4096]
+RUNS = 5
+SALT = "reza"
+CSV_HEADER = "case,size,run,time_us,mem_free_delta,peak_bytes,ok"
+
+# Time cache file of a run without Wi-Fi, removed again when the run is over
+BENCH_CACHE_FILE = "ppe_bench_time.json"
+
+
+# Same ASCII payload of the same size on every run and every board
+def make_payload(size):
+    text = "PPE benchmark payload 0123456789 "
+    return (text * (size // len(text) + 1))[:size]
+
+
+# No Wi-Fi (the unix port): the local clock is taken as synced, as the RTC is after a sync,
+# in a time cache of the bench's own so the ppe_time.json of later runs is left alone.
+# PPEC reads the same clock, so no case waits on the network. Returns the cache to restore.
+def use_local_clock():
+    previous = PPE.time_cache
+    if PPE.network is None:
+        PPE.time_cache = TimeCache(BENCH_CACHE_FILE)
+        PPE.time_cache.synced(sntp.rtc_unix_time())
+    if ppec is not None:
+        ppec.get_unix_time = lambda: int(PPE.get_unix_time())
+    return previous
+
+
+def restore_clock(previous):
+    if PPE.time_cache is not previous:
+        PPE.time_cache = previous
+        try:
+            os.remove(BENCH_CACHE_FILE)
+        except OSError:
+            pass
+
+
+# The key epoch of now, as the derivation of PPE and PPD sees it
+def current_epoch():
+    return str(int(PPE.get_unix_time()))[:8]
+
+
+# case name, sizes (None = every size), setup(text) -> args, timed function, expected result or None
+def build_cases():
+    key = ubinascii.b2a_base64(PPE.get_current_time_key(SALT))
+    cases = [
+        # Only the derivation, as on an epoch change: no time cache lookup or RTC memory write
+        ('key', [0], lambda text: (SALT, current_epoch()), PPE.derive_time_key, None),
+        ('PPE', None, lambda text: (text, SALT), PPE.PPE, None),
+        ('PPD', None, lambda text: (PPE.PPE(text, SALT), SALT), PPE.PPD, True),
+        ('AES_encrypt', None, lambda text: (text, key), PPE.single_core_encrypt, None),
+        ('AES_decrypt', None, lambda text: (PPE.single_core_encrypt(text, key), key), PPE.single_core_decrypt, True),
+    ]
+    if ppec is not None:
+        ppec_key = ppec.get_current_time_key(SALT)
+        cases += [
+            ('PPEC_key', [0], lambda text: (SALT,), ppec.get_current_time_key, None),
+            ('PPEC_encrypt', None, lambda text: (text, ppec_key), ppec.multi_core_encrypt, None),
+            ('PPEC_decrypt', None, lambda text: (ppec.multi_core_encrypt(text, ppec_key), ppec_key),
+             ppec.multi_core_decrypt, True),
+        ]
+    return cases
+
+
+# (time_us, mem_free_delta, peak_bytes, ok) of one call, ok False when it raised or gave a wrong result
+def measure(func, args, expected):
+    gc.collect()
+    before = gc.mem_free()
+    elapsed = peak = 0
+    ok = False
+    gc.disable()
+    try:
+        start = time.ticks_us()
+        result = func(*args)
+        elapsed = time.ticks_diff(time.ticks_us(), start)
+        peak = before - gc.mem_free()
+        ok = result == expected if expected is not None else True
+        result = None
+    except Exception as e:  # MemoryError included: with the GC off a large payload may not fit
+        print("# %s failed: %r" % (getattr(func, '__name__', func), e))
+    finally:
+        gc.enable()
+    gc.collect()
+    return elapsed, gc.mem_free() - before, peak, ok
+
+
+def board_info():
+    freq = machine.freq() if machine is not None and hasattr(machine, 'freq') else 0
+    return "# ppe_bench platform=%s freq=%s mem_free=%d ppec=%s" % (
+        sys.platform, freq, gc.mem_free(), ppec is not None)
+
+
+def run(sizes=SIZES, runs=RUNS, emit=print):
+    previous = use_local_clock()
+    try:
+        emit(board_info())
+        emit(CSV_HEADER)
+        for name, case_sizes, setup, func, check in build_cases():
+            for size in case_sizes or sizes:
+                text = make_payload(size)
+                for n in range(runs):
+                    # Set up on every run: a ciphertext from the previous key epoch would not decrypt
+                    args = setup(text)
+                    elapsed, delta, peak, ok = measure(func, args, text if check else None)
+                    emit("%s,%d,%d,%d,%d,%d,%d" % (name, size, n, elapsed, delta, peak, ok))
+    finally:
+        restore_clock(previous)
+
+
+if __name__ == '__main__':
+    sizes = [int(size) for size in sys.argv[1].split(",")] if len(sys.argv) > 1 else SIZES
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else RUNS
+    run(sizes, runs)
@@ -0,0 +1,66 @@
+import time
+import socket
+import struct
+
+try:
+    import machine
+except ImportError:
+    machine = None
+
+
+# SNTP (RFC 4330) client: one 48 byte UDP request and reply instead of an HTTP(S) round trip
+# and a JSON parse. The reply sets the RTC, so later reads of the time are local.
+NTP_HOST = "pool.ntp.org"
+NTP_PORT = 123
+TIMEOUT = 2
+
+# Seconds from the NTP era (1900) to the unix epoch
+NTP_DELTA = 2208988800
+
+# time.time() counts from 2000 on older ESP32 builds, from 1970 on newer ones and the unix port
+EPOCH_OFFSET = 946684800 if time.gmtime(0)[0] == 2000 else 0
+
+
+# Unix time of the SNTP server, OSError when it does not answer or answers nonsense
+def query(host=None, port=None, timeout=TIMEOUT):
+    request = bytearray(48)
+    request[0] = 0x1B  # LI 0, version 3, mode 3 (client)
+    address = socket.getaddrinfo(host or NTP_HOST, port or NTP_PORT)[0][-1]
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.settimeout(timeout)
+        sock.sendto(request, address)
+        reply = sock.recv(48)
+    finally:
+        sock.close()
+
+    # Mode 4 (server) and a non-zero stratum, stratum 0 is a kiss-o'-death
+    if len(reply) < 48 or reply[0] & 7 != 4 or reply[1] == 0:
+        raise OSError("bad SNTP reply")
+    seconds = struct.unpack("!I", reply[40:44])[0]
+    # Transmit seconds below 2^31 are in the next NTP era (after 2036)
+    if seconds < 0x80000000:
+        seconds += 0x100000000
+    return seconds - NTP_DELTA
+
+
+# Set the RTC to unix_time, False on ports without one (the unix port keeps the host clock)
+def set_rtc(unix_time):
+    if machine is None or not hasattr(machine, 'RTC'):
+        return False
+    tm = time.gmtime(unix_time - EPOCH_OFFSET)
+    machine.RTC().datetime((tm[0], tm[1], tm[2], tm[6] + 1, tm[3], tm[4], tm[5], 0))
+    return True
+
+
+# Unix time read off the RTC
+def rtc_unix_time():
+    return time.time() + EPOCH_OFFSET
+
+
+# Query the server and set the RTC once, returns the unix time
+def sync(host=None, port=None, timeout=TIMEOUT):
+    unix_time = query(host, port, timeout)
+    set_rtc(unix_time)
+    return unix_time
@@ -0,0 +1,67 @@
+import time
+import socket
+import struct
+import argparse
+
+
+# Minimal SNTP responder for testing the device time sync without the internet, on the
+# host (CPython) against the MicroPython unix port or a board on the same network:
+#
+#   python3 sntp_server.py --port 1123
+#   micropython -c "import sntp; print(sntp.sync('127.0.0.1', 1123))"
+#
+# --offset shifts the served time, to try key epoch rollovers and a drifting RTC.
+NTP_DELTA = 2208988800
+
+
+def ntp_timestamp(unix_time):
+    seconds = int(unix_time)
+    fraction = int((unix_time - seconds) * 0x100000000)
+    return struct.pack("!II", (seconds + NTP_DELTA) & 0xFFFFFFFF, fraction)
+
+
+def build_reply(request, unix_time):
+    version = (request[0] >> 3) & 7 or 3
+    reply = bytearray(48)
+    reply[0] = (version << 3) | 4  # LI 0, the client's version, mode 4 (server)
+    reply[1] = 2                   # stratum 2, a synchronized secondary server
+    reply[2] = request[2]          # poll interval
+    reply[3] = 0xEC                # precision, about 1 us
+    reply[12:16] = b"LOCL"
+    stamp = ntp_timestamp(unix_time)
+    reply[16:24] = stamp           # reference timestamp
+    reply[24:32] = request[40:48]  # originate = the client's transmit timestamp
+    reply[32:40] = stamp           # receive timestamp
+    reply[40:48] = ntp_timestamp(unix_time)  # transmit timestamp
+    return bytes(reply)
+
+
+def serve(host, port, offset=0.0, count=None):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind((host, port))
+    print("SNTP responder on %s:%d, offset %+.1f s" % (host, port, offset))
+    served = 0
+    try:
+        while count is None or served < count:
+            request, address = sock.recvfrom(512)
+            if len(request) < 48:
+                continue
+            sock.sendto(build_reply(request, time.time() + offset), address)
+            served += 1
+            print("served %s:%d" % address)
+    finally:
+        sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SNTP responder for testing the device time sync")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=1123, help="123 needs root")
+    parser.add_argument("--offset", type=float, default=0.0, help="seconds added to the served time")
+    parser.add_argument("--count", type=int, help="exit after this many replies")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.offset, args.count)
+
+
+if __name__ == '__main__':
+    main()
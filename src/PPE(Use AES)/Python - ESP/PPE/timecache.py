@@ -0,0 +1,89 @@
+import time
+import json
+
+try:
+    import machine
+except ImportError:
+    machine = None
+
+
+# Flash file used when the port has no RTC memory (the unix port)
+CACHE_FILE = "ppe_time.json"
+
+# Seconds of RTC drift allowed to build up before the unix time is fetched again
+RESYNC_SECONDS = 3600
+
+
+# Unix time and key of the last sync, kept across deep sleep.
+#
+# RTC memory (and the RTC clock) survive deep sleep, so a node that wakes every minute
+# reads the unix time as the time of the last sync plus the RTC seconds since then,
+# with no Wi-Fi and no HTTP round trip. A power loss clears RTC memory, the next
+# get_unix_time syncs again.
+#
+#   {"unix": unix time at sync, "rtc": time.time() at sync,
+#    "salt": salt, "epoch": 8 digit key epoch, "key": its key}
+class TimeCache:
+    def __init__(self, path=CACHE_FILE, resync=RESYNC_SECONDS):
+        self.path = path
+        self.resync = resync
+        self.rtc = machine.RTC() if machine is not None and hasattr(machine, 'RTC') else None
+        self.state = self.load()
+
+    def load(self):
+        raw = ""
+        try:
+            if self.rtc is not None:
+                raw = bytes(self.rtc.memory()).decode('utf-8')
+            else:
+                with open(self.path) as f:
+                    raw = f.read()
+        except (OSError, AttributeError, UnicodeError):
+            pass
+        try:
+            state = json.loads(raw) if raw else {}
+        except ValueError:
+            state = {}
+        return state if isinstance(state, dict) else {}
+
+    def save(self):
+        raw = json.dumps(self.state)
+        try:
+            if self.rtc is not None:
+                self.rtc.memory(raw)
+            else:
+                with open(self.path, 'w') as f:
+                    f.write(raw)
+        # ValueError: more than the 2 KB of RTC memory (a very long salt), there is just no cache then
+        except (OSError, AttributeError, ValueError):
+            pass
+
+    # Unix time read off the RTC, None when there was no sync yet or it is due again
+    def now(self):
+        if 'unix' not in self.state:
+            return None
+        elapsed = time.time() - self.state['rtc']
+        # A clock that went backwards was reset, its offset means nothing anymore
+        if elapsed < 0 or elapsed >= self.resync:
+            return None
+        return self.state['unix'] + elapsed
+
+    def synced(self, unix_time):
+        self.state = {'unix': int(unix_time), 'rtc': time.time()}
+        self.save()
+
+    # Key of salt for the 8 digit epoch when it is the cached one, else None
+    def key(self, salt, epoch):
+        if self.state.get('epoch') == epoch and self.state.get('salt') == salt:
+            return self.state.get('key')
+        return None
+
+    def store_key(self, salt, epoch, key):
+        self.state['salt'] = salt
+        self.state['epoch'] = epoch
+        self.state['key'] = key
+        self.save()
+
+    def clear(self):
+        self.state = {}
+        self.save()
@@ -1,87 +1,88 @@
-from Crypto.Cipher import AES
-from Crypto.Random import get_random_bytes
-from Crypto.Util.Padding import pad, unpad
 import base64
-import time
-import re
-import multiprocessing as mp
-import requests
+import os
+import mmap
+from collections import deque
+from contextlib import contextmanager
+from parallel_engine import get_engine
+from key_cache import EpochKeyCache, CipherCache
+from time_source import get_time_source
+from stats import CallTimer
+from backends import get_backend, add_backend_listener
+from container import (MAX_SEGMENTS, pack_segments, allocate_segments, unpack_segments, is_container, read_epoch,
+                       armor, dearmor, pack_stream_header, pack_frame_length, read_stream_header, read_frames,
+                       NONCE_SIZE, is_seekable, allocate_seekable, unpack_seekable)
+
+
+# Get online unix time (synced once, then served from the local monotonic clock)
+def get_unix_time():
+    return int(get_time_source().now())
 
 
-# Get online unix time
-def get_unix_time():
-    # Fetch the JSON response from the API
-    response = requests.get("https://worldtimeapi.org/api/timezone/asia/tehran")
-    # response = requests.get("http://ip-api.com/json/?fields=status,message,timezone,offset")
+# AES block size, known without importing the cipher module
+BLOCK_SIZE = 16
 
-    if response.status_code == 200:
-        data = response.json()
-        # Extract the Unix time
-        unix_time = data.get('unixtime', 'N/A')
 
-    response.close()
-    return unix_time
+# New AES-ECB cipher from the backend picked for this machine (see backends.py), imported on first use
+def new_aes_ecb(key):
+    return get_backend('aes-ecb').aes_ecb(key)
 
 
-# Get generate key from unixtime
-def get_current_time_key(salt):
-    keybase = ""
-    key = ""
+# PKCS#7 padding, same behaviour as Crypto.Util.Padding without importing it
+def pad(data, block_size):
+    pad_len = block_size - len(data) % block_size
+    return bytes(data) + bytes([pad_len]) * pad_len
 
-    # Simulate the TimeStep.GetTimeStep() method
-    try:
-        timestep = int(get_unix_time())
-    except print(0):
-        timestep = int(time.time())
-        pass
 
-    timestep8 = str(timestep)[:8]
-    # print(timestep8);
-    timestep8char = list(timestep8)
+def unpad(data, block_size):
+    if len(data) == 0 or len(data) % block_size:
+        raise ValueError("Input data is not padded")
+    pad_len = data[-1]
+    if not 0 < pad_len <= block_size or bytes(data[-pad_len:]) != bytes([pad_len]) * pad_len:
+        raise ValueError("Padding is incorrect.")
+    return bytes(data[:-pad_len])
 
-    # Get keybase first 8 numbers
-    keybase = timestep8
 
-    for i in range(len(timestep8char) - 1, -1, -1):
-        keybase += timestep8char[i]
+# Derived keys, reused until their 100 second epoch ends
+key_cache = EpochKeyCache()
 
-    for i in range(len(timestep8char)):
-        keybase += timestep8char[i]
+# Expanded AES key schedules, per thread, dropped when the epoch ends
+cipher_cache = CipherCache(lambda key: new_aes_ecb(key.encode('utf-8')))
+key_cache.add_epoch_listener(cipher_cache.new_epoch)
+add_backend_listener(cipher_cache.new_epoch)
 
-    for i in range(len(timestep8char) - 1, -1, -1):
-        keybase += timestep8char[i]
 
-    for i in range(len(timestep8char)):
-        keybase += timestep8char[i]
+# ECB cipher of a key string (its first 16 characters are the AES key), reused per thread
+def get_cipher(key_str):
+    return cipher_cache.get(key_str[0:16])
 
-    for i in range(len(timestep8char) - 1, -1, -1):
-        keybase += timestep8char[i]
 
-    for i in range(len(timestep8char)):
-        keybase += timestep8char[i]
+# Key epoch of a unix time: its first 8 digits, so one epoch lasts 100 seconds
+def get_epoch(timestep=None):
+    # Simulate the TimeStep.GetTimeStep() method
+    if timestep is None:
+        timestep = get_unix_time()
 
-    for i in range(len(timestep8char) - 1, -1, -1):
-        keybase += timestep8char[i]
+    return int(str(timestep)[:8])
 
-    for i in range(len(timestep8char)):
-        keybase += timestep8char[i]
 
-    for i in range(len(timestep8char) - 1, -1, -1):
-        keybase += timestep8char[i]
+# Get generate key from unixtime
+def get_current_time_key(salt, timestep=None):
+    timestep8 = str(get_epoch(timestep))
+    return key_cache.get(salt, timestep8, derive_time_key)
 
-    for i in range(len(timestep8char)):
-        keybase += timestep8char[i]
 
-    for i in range(len(timestep8char) - 1, -1, -1):
-        keybase += timestep8char[i]
+# Build the key of one epoch (timestep8 is the first 8 digits of the unix time)
+def derive_time_key(salt, timestep8):
+    key = ""
 
-    for i in range(len(timestep8char)):
-        keybase += timestep8char[i]
+    # Get keybase: the 8 digits, then reversed/forward copies of them
+    forward = timestep8
+    backward = timestep8[::-1]
+    keybase = forward + (backward + forward) * 6
 
-    keybasechar = list(keybase)
-    for i in range(0, len(keybasechar) // 2, 2):
-        num_a = keybasechar[i]
-        num_b = keybasechar[i + 1]
+    for i in range(0, len(keybase) // 2, 2):
+        num_a = keybase[i]
+        num_b = keybase[i + 1]
 
         add_num = int(num_a + num_b)
         key_char = chr(add_num)
@@ -99,84 +100,562 @@ def get_key(key_str):
     return key_str
 
 
+# Encrypt one segment to raw ciphertext bytes
+def encrypt_segment(data, key_str):
+    cipher = get_cipher(key_str)
+    return cipher.encrypt(pad(data, BLOCK_SIZE))
+
+
+# Decrypt one raw ciphertext segment
+def decrypt_segment(ct, key_str):
+    cipher = get_cipher(key_str)
+    return unpad(cipher.decrypt(ct), BLOCK_SIZE)
+
+
 # Encrypt function
 def single_core_encrypt(data, key_str):
-    key = key_str[0:16]
-    # key = byte_data.decode('utf-8')
-
-    cipher = AES.new(key.encode('utf-8'), AES.MODE_ECB)
-    # cipher = AES.new(key, AES.MODE_ECB)
-    ct_bytes = cipher.encrypt(pad(data.encode('utf-8'), AES.block_size))
+    ct_bytes = encrypt_segment(data.encode('utf-8'), key_str)
     ct = base64.b64encode(ct_bytes).decode('utf-8')
     return ct
 
 
 # Decrypt function
 def single_core_decrypt(enc_data, key_str):
-    key = key_str[0:16]
-    # key = byte_data.decode('utf-8')
-
     ct = base64.b64decode(enc_data)
-    cipher = AES.new(key.encode('utf-8'), AES.MODE_ECB)
-    # cipher = AES.new(key, AES.MODE_ECB)
-    pt = unpad(cipher.decrypt(ct), AES.block_size)
+    pt = decrypt_segment(ct, key_str)
     return pt.decode('utf-8')
 
 
-# Multi core encryption function
-def multi_core_encrypt(data, key_str):
-    # Calculate the midpoint of the string
+# Encrypt src into dst (len(dst) == padded length of src), nothing but the last block is copied
+def encrypt_segment_into(job, key_str):
+    src, dst = job
+    cipher = get_cipher(key_str)
+
+    full = len(src) - len(src) % BLOCK_SIZE
+    if full:
+        cipher.encrypt(src[:full], output=dst[:full])
+    cipher.encrypt(pad(bytes(src[full:]), BLOCK_SIZE), output=dst[full:])
+
+
+# Decrypt every block of src except the last one into dst
+def decrypt_segment_into(job, key_str):
+    src, dst = job
+    cipher = get_cipher(key_str)
+
+    if len(src):
+        cipher.decrypt(src, output=dst)
+
+
+def _as_byte_view(data):
+    view = memoryview(data)
+    if view.format != 'B' or view.ndim != 1:
+        view = view.cast('B')
+    return view
+
+
+# Multi core encryption of bytes, returns a binary container (recording epoch, the key epoch, when given)
+def multi_core_encrypt_bytes(data, key_str, segments=None, epoch=None, timer=None):
+    engine = get_engine()
+    view = _as_byte_view(data)
+
+    # Divide the data into segments (two halves for small payloads), memoryview slices only
+    count = min(segments or engine.segment_count(len(view)), MAX_SEGMENTS)
+    parts = engine.split(view, count)
+    parallel = engine.is_parallel(len(view))
+    if timer is not None:
+        timer.nbytes += len(view)
+        timer.segments += count
+
+    # Child processes cannot write into our buffer, they hand their segment back
+    if engine.use_processes:
+        if timer is not None:
+            timer.mark('split')
+        ciphers = engine.map(encrypt_segment, parts, key_str, parallel=parallel)
+        if timer is not None:
+            timer.mark('aes')
+        blob = pack_segments(ciphers, epoch)
+        if timer is not None:
+            timer.mark('join')
+        return blob
+
+    # Encrypt every segment straight into its slot of the preallocated container
+    lengths = [(len(part) // BLOCK_SIZE + 1) * BLOCK_SIZE for part in parts]
+    buffer, slots = allocate_segments(lengths, epoch)
+    if timer is not None:
+        timer.mark('split')
+    engine.map(encrypt_segment_into, list(zip(parts, slots)), key_str, parallel=parallel)
+    if timer is not None:
+        timer.mark('aes')
+    blob = bytes(buffer)
+    if timer is not None:
+        timer.mark('join')
+    return blob
+
+
+# Multi core decryption of a binary container, returns bytes
+def multi_core_decrypt_bytes(blob, key_str, timer=None):
+    engine = get_engine()
+    segments = unpack_segments(blob)
+    parallel = engine.is_parallel(len(blob))
+    if timer is not None:
+        timer.nbytes += len(blob)
+        timer.segments += len(segments)
+
+    if engine.use_processes:
+        if timer is not None:
+            timer.mark('split')
+        texts = engine.map(decrypt_segment, segments, key_str, parallel=parallel)
+        if timer is not None:
+            timer.mark('aes')
+        data = b"".join(texts)
+        if timer is not None:
+            timer.mark('join')
+        return data
+
+    # Decrypt the last block of every segment first: its padding gives the plaintext length
+    cipher = get_cipher(key_str)
+    tails = []
+    for segment in segments:
+        if len(segment) == 0 or len(segment) % BLOCK_SIZE:
+            raise ValueError("Data must be padded to 16 byte boundary in ECB mode")
+        tails.append(unpad(cipher.decrypt(segment[-BLOCK_SIZE:]), BLOCK_SIZE))
+
+    # Then decrypt the remaining blocks in parallel straight into the output buffer
+    total = sum(len(segment) - BLOCK_SIZE + len(tail) for segment, tail in zip(segments, tails))
+    buffer = bytearray(total)
+    out = memoryview(buffer)
+
+    jobs = []
+    offset = 0
+    for segment, tail in zip(segments, tails):
+        body = len(segment) - BLOCK_SIZE
+        jobs.append((segment[:body], out[offset:offset + body]))
+        out[offset + body:offset + body + len(tail)] = tail
+        offset += body + len(tail)
+
+    if timer is not None:
+        timer.mark('split')
+    engine.map(decrypt_segment_into, jobs, key_str, parallel=parallel)
+    if timer is not None:
+        timer.mark('aes')
+    data = bytes(buffer)
+    if timer is not None:
+        timer.mark('join')
+    return data
+
+
+# Multi core encryption function, returns a binary container (text armored unless armored=False)
+def multi_core_encrypt(data, key_str, segments=None, armored=True, epoch=None, timer=None):
+    blob = multi_core_encrypt_bytes(data.encode('utf-8'), key_str, segments, epoch, timer)
+    if not armored:
+        return blob
+
+    text = armor(blob)
+    if timer is not None:
+        timer.mark('base64')
+    return text
+
+
+# Multi core decryption function, accepts armored text, a raw container or a legacy "~|~" ciphertext
+def multi_core_decrypt(data, key_str, timer=None):
+    blob = dearmor(data) if isinstance(data, str) else data
+    if not is_container(blob):
+        return legacy_multi_core_decrypt(blob, key_str)
+    if is_seekable(blob):
+        return multi_core_decrypt_seekable(blob, key_str).decode('utf-8')
+
+    text = multi_core_decrypt_bytes(blob, key_str, timer).decode('utf-8')
+    if timer is not None:
+        timer.mark('join')
+    return text
+
+
+# Encrypt to the previous format, the one the MicroPython, Java and C++ decoders read:
+# the two halves as base64 joined with "~|~", base64 encoded again
+def legacy_multi_core_encrypt(data, key_str):
+    engine = get_engine()
+
     midpoint = len(data) // 2
+    halves = [data[:midpoint], data[midpoint:]]
+    Ciphers = engine.map(single_core_encrypt, halves, key_str, parallel=engine.is_parallel(len(data)))
 
-    # Divide the string into two halves
-    Left_Data = data[:midpoint]
-    Right_Data = data[midpoint:]
+    cipher = "~|~".join(Ciphers)
+    return base64.b64encode(cipher.encode('utf-8')).decode('utf-8')
 
-    with mp.Pool(1) as pool:
-        Left_Cipher = single_core_encrypt(Left_Data, key_str)
 
-    with mp.Pool(1) as pool:
-        Right_Cipher = single_core_encrypt(Right_Data, key_str)
+# Decrypt the previous format: base64 segments joined with "~|~", base64 encoded again
+def legacy_multi_core_decrypt(Ciphers, key_str):
+    engine = get_engine()
 
-    cipher = "%s~|~%s" % (Left_Cipher, Right_Cipher)
-    encoded_bytes = base64.b64encode(cipher.encode('utf-8'))
-    encoded_string = encoded_bytes.decode('utf-8')
-    return encoded_string
+    Ciphers_str = bytes(Ciphers).decode('utf-8')
+    main_cipher = Ciphers_str.split('~|~')
 
+    texts = engine.map(single_core_decrypt, main_cipher, key_str, parallel=engine.is_parallel(len(Ciphers)))
 
-# Multi core decryption function
-def multi_core_decrypt(data, key_str):
-    Ciphers = base64.b64decode(data)
-    Ciphers_str = Ciphers.decode('utf-8')
-    main_cipher = Ciphers_str.split('~|~')
+    return "".join(texts)
 
-    # Get parallel processing satrt
-    with mp.Pool(1) as pool:
-        Left_Text = single_core_decrypt(main_cipher[0], key_str)
 
-    with mp.Pool(1) as pool:
-        Right_Text = single_core_decrypt(main_cipher[1], key_str)
-    # Get parallel processing end
 
-    return Left_Text + Right_Text
 
 
 
+#Main functions for call PPE
 
+# AES key string of an epoch for salt, advance=False leaves the key cache in its current epoch
+def get_epoch_key(salt, epoch, advance=True):
+    key_bytes = base64.b64encode(key_cache.get(salt, str(epoch), derive_time_key, advance).encode('utf-8'))
+    return key_bytes.decode('utf-8')
 
 
-#Main functions for call PPE
+# Key epochs a ciphertext header may be ahead of the local clock (sender clock skew)
+MAX_EPOCH_AHEAD = 1
+
+
+# AES key string of the epoch in a ciphertext header. The header is not trusted: it never moves
+# the key cache to a newer epoch, and an epoch too far ahead of the local clock is refused
+def get_header_key(salt, epoch, timestep=None):
+    if epoch > get_epoch(timestep) + MAX_EPOCH_AHEAD:
+        raise ValueError("ciphertext key epoch %d is ahead of the local clock" % epoch)
+    return get_epoch_key(salt, epoch, advance=False)
+
+
+# AES key string of the current epoch (or of the epoch of timestep) for salt
+def get_ppe_key(salt, timestep=None):
+    return get_epoch_key(salt, get_epoch(timestep))
+
+
+# Key of a ciphertext: the epoch in its header (see get_header_key), the current time for version 1 and legacy ciphertexts
+def get_decrypt_key(blob, salt):
+    epoch = read_epoch(blob) if is_container(blob) else None
+    if epoch is None:
+        return get_ppe_key(salt)
+    return get_header_key(salt, epoch)
+
+
+# Opt-in per-stage timing: set_stats(PPEStats()), None keeps PPE/PPD free of any timing
+_stats = None
+
 
-def PPE(inp,salt):
-    key_bytes = base64.b64encode(get_current_time_key(salt).encode('utf-8'))
-    key = key_bytes.decode('utf-8')
-    return multi_core_encrypt(inp, key)
+def set_stats(stats):
+    global _stats
+    _stats = stats
+    return stats
+
+
+# Output formats of PPE: 'container' (the binary container, base64 text unless armored=False)
+# or 'legacy' (the "~|~" text of the MicroPython, Java and C++ versions, no key epoch in it)
+FORMATS = ('container', 'legacy')
+
+
+def PPE(inp,salt,armored=True,format='container'):
+    if format not in FORMATS:
+        raise ValueError("unknown PPE format %r, expected one of %s" % (format, ", ".join(FORMATS)))
+    stats = _stats
+    timer = CallTimer('PPE') if stats is not None else None
+
+    epoch = get_epoch()
+    if timer is not None:
+        timer.mark('time')
+    key = get_epoch_key(salt, epoch)
+    if timer is not None:
+        timer.mark('key')
+
+    if format == 'legacy':
+        result = legacy_multi_core_encrypt(inp, key)
+        if timer is not None:
+            timer.nbytes += len(inp)
+            timer.mark('aes')
+    else:
+        result = multi_core_encrypt(inp, key, armored=armored, epoch=epoch, timer=timer)
+    if timer is not None:
+        stats.record(timer)
+    return result
 
 
 def PPD(inp,salt):
-    key_bytes = base64.b64encode(get_current_time_key(salt).encode('utf-8'))
-    key = key_bytes.decode('utf-8')
-    return multi_core_decrypt(inp, key)
+    stats = _stats
+    timer = CallTimer('PPD') if stats is not None else None
+
+    blob = dearmor(inp) if isinstance(inp, str) else inp
+    if timer is not None:
+        timer.mark('base64')
+    key = get_decrypt_key(blob, salt)
+    if timer is not None:
+        timer.mark('key')
+
+    result = multi_core_decrypt(blob, key, timer)
+    if timer is not None:
+        stats.record(timer)
+    return result
+
+
+# bytes / bytearray / memoryview in, binary container out
+def PPE_bytes(data, salt, segments=None):
+    stats = _stats
+    timer = CallTimer('PPE_bytes') if stats is not None else None
+
+    epoch = get_epoch()
+    if timer is not None:
+        timer.mark('time')
+    key = get_epoch_key(salt, epoch)
+    if timer is not None:
+        timer.mark('key')
+
+    result = multi_core_encrypt_bytes(data, key, segments, epoch, timer)
+    if timer is not None:
+        stats.record(timer)
+    return result
+
+
+# Binary container (or a legacy ciphertext) in, bytes out
+def PPD_bytes(blob, salt):
+    stats = _stats
+    timer = CallTimer('PPD_bytes') if stats is not None else None
+
+    key = get_decrypt_key(blob, salt)
+    if timer is not None:
+        timer.mark('key')
+    if is_container(blob) and not is_seekable(blob):
+        result = multi_core_decrypt_bytes(blob, key, timer)
+    else:
+        if is_container(blob):
+            result = multi_core_decrypt_seekable(blob, key)
+        else:
+            result = legacy_multi_core_decrypt(blob, key).encode('utf-8')
+        if timer is not None:
+            timer.nbytes += len(blob)
+            timer.mark('aes')
+
+    if timer is not None:
+        stats.record(timer)
+    return result
+
+
+# Encrypt many small messages with one key derivation, one cipher and one AES call
+def PPE_batch(messages, salt, armored=True):
+    epoch = get_epoch()
+    key = get_epoch_key(salt, epoch)
+    cipher = get_cipher(key)
+
+    # Split every message into its two halves and pad them into one buffer
+    halves = []
+    for message in messages:
+        data = message.encode('utf-8') if isinstance(message, str) else bytes(message)
+        midpoint = len(data) // 2
+        halves.append(data[:midpoint])
+        halves.append(data[midpoint:])
+
+    lengths = [(len(half) // BLOCK_SIZE + 1) * BLOCK_SIZE for half in halves]
+    buffer = bytearray(sum(lengths))
+    offset = 0
+    for half, length in zip(halves, lengths):
+        buffer[offset:offset + length] = pad(half, BLOCK_SIZE)
+        offset += length
+
+    ct = memoryview(cipher.encrypt(buffer))
+
+    # Slice the halves back out and frame one container per message
+    results = []
+    offset = 0
+    for i in range(0, len(lengths), 2):
+        left = ct[offset:offset + lengths[i]]
+        right = ct[offset + lengths[i]:offset + lengths[i] + lengths[i + 1]]
+        offset += lengths[i] + lengths[i + 1]
+        blob = pack_segments([left, right], epoch)
+        results.append(armor(blob) if armored else blob)
+    return results
+
+
+# Decrypt the segments of many containers of one key with one AES call, returns their plaintexts
+def decrypt_containers(containers, key_str):
+    segments = [part for parts in containers for part in parts]
+    for part in segments:
+        if len(part) == 0 or len(part) % BLOCK_SIZE:
+            raise ValueError("Data must be padded to 16 byte boundary in ECB mode")
+    pt = memoryview(get_cipher(key_str).decrypt(b"".join(segments)))
+
+    results = []
+    offset = 0
+    for parts in containers:
+        pieces = []
+        for part in parts:
+            pieces.append(unpad(pt[offset:offset + len(part)], BLOCK_SIZE))
+            offset += len(part)
+        results.append(b"".join(pieces))
+    return results
+
+
+# Decrypt many PPE ciphertexts with one cipher and one AES call per key epoch
+def PPD_batch(ciphertexts, salt, decode=True):
+    results = [None] * len(ciphertexts)
+
+    # Group the segments of every container by key, legacy and seekable ciphertexts are decrypted on their own
+    groups = {}
+    for i, ciphertext in enumerate(ciphertexts):
+        blob = dearmor(ciphertext) if isinstance(ciphertext, str) else ciphertext
+        key = get_decrypt_key(blob, salt)
+        if not is_container(blob):
+            results[i] = legacy_multi_core_decrypt(blob, key).encode('utf-8')
+            continue
+        if is_seekable(blob):
+            results[i] = multi_core_decrypt_seekable(blob, key)
+            continue
+        groups.setdefault(key, []).append((i, unpack_segments(blob)))
+
+    for key, members in groups.items():
+        for (i, _), data in zip(members, decrypt_containers([parts for _, parts in members], key)):
+            results[i] = data
+
+    if decode:
+        return [data.decode('utf-8') for data in results]
+    return results
+
+
+# AES-CTR cipher of a key string whose keystream starts at block number block (not cached: it keeps state)
+def get_ctr_cipher(key_str, nonce, block):
+    return get_backend('aes-ctr').aes_ctr(key_str[0:16].encode('utf-8'), nonce, block)
+
+
+# XOR a segment starting at byte offset (a multiple of BLOCK_SIZE) with its keystream
+def ctr_segment(job, key_str, nonce):
+    src, offset = job
+    return get_ctr_cipher(key_str, nonce, offset // BLOCK_SIZE).encrypt(src)
+
+
+def ctr_segment_into(job, key_str, nonce):
+    src, dst, offset = job
+    get_ctr_cipher(key_str, nonce, offset // BLOCK_SIZE).encrypt(src, output=dst)
+
+
+# XOR src (the bytes from byte offset on, offset a multiple of BLOCK_SIZE) with the keystream into dst,
+# block-aligned segments run in parallel as each one starts its own counter
+def _ctr_apply(src, dst, key_str, nonce, offset=0):
+    engine = get_engine()
+    count = engine.segment_count(len(src))
+    size = max(BLOCK_SIZE, -(-len(src) // count // BLOCK_SIZE) * BLOCK_SIZE)
+    starts = range(0, len(src), size)
+    parallel = engine.is_parallel(len(src))
+
+    if engine.use_processes:
+        jobs = [(bytes(src[start:start + size]), offset + start) for start in starts]
+        for start, part in zip(starts, engine.map(ctr_segment, jobs, key_str, nonce, parallel=parallel)):
+            dst[start:start + len(part)] = part
+        return
+
+    jobs = [(src[start:start + size], dst[start:start + size], offset + start) for start in starts]
+    engine.map(ctr_segment_into, jobs, key_str, nonce, parallel=parallel)
+
+
+# Multi core AES-CTR encryption of bytes into a seekable container
+def multi_core_encrypt_seekable(data, key_str, epoch):
+    view = _as_byte_view(data)
+    nonce = os.urandom(NONCE_SIZE)
+    buffer, body = allocate_seekable(len(view), epoch, nonce)
+    _ctr_apply(view, body, key_str, nonce)
+    return bytes(buffer)
+
+
+# Decrypt the bytes [start, end) of a seekable container, only the blocks they cover are computed
+def multi_core_decrypt_seekable(blob, key_str, start=0, end=None):
+    _, nonce, body = unpack_seekable(blob)
+    start, end, _ = slice(start, end).indices(len(body))
+    if end <= start:
+        return b""
+
+    first = start - start % BLOCK_SIZE
+    out = bytearray(end - first)
+    _ctr_apply(body[first:end], memoryview(out), key_str, nonce, first)
+    return bytes(out) if first == start else bytes(memoryview(out)[start - first:])
+
+
+# Seekable PPE: text or bytes in, a binary container whose byte ranges decrypt on their own (see PPD_range)
+def PPE_seekable(data, salt):
+    epoch = get_epoch()
+    key = get_epoch_key(salt, epoch)
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return multi_core_encrypt_seekable(data, key, epoch)
+
+
+def PPD_seekable(blob, salt):
+    return multi_core_decrypt_seekable(blob, get_decrypt_key(blob, salt))
+
+
+# Plaintext bytes [start, end) of a PPE_seekable container (blob may be an mmap: only the range is read)
+def PPD_range(blob, salt, start, end):
+    return multi_core_decrypt_seekable(blob, get_decrypt_key(blob, salt), start, end)
+
+
+# Default plaintext block of a stream frame
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+
+# Yield the blocks of a file-like object, or of an mmap of a path
+@contextmanager
+def _open_blocks(source, block_size):
+    if isinstance(source, (str, bytes, os.PathLike)):
+        with open(source, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                yield iter(())
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield (mapped[i:i + block_size] for i in range(0, size, block_size))
+    else:
+        yield iter(lambda: source.read(block_size), b"")
+
+
+# Write finished frames in order, keeping at most max_in_flight blocks in memory
+def _run_stream(blocks, writer, func, key, max_in_flight):
+    engine = get_engine()
+    in_flight = max_in_flight or 2 * engine.segments
+    pending = deque()
+    total = 0
+
+    for block in blocks:
+        total += len(block)
+        pending.append(engine.submit(func, block, key))
+        if len(pending) >= in_flight:
+            writer(pending.popleft().result())
+
+    while pending:
+        writer(pending.popleft().result())
+    return total
+
+
+# Streaming encryption: reader is a binary file-like object or a path, returns the plaintext size
+def PPE_stream(reader, writer, salt, block_size=STREAM_BLOCK_SIZE, max_in_flight=None):
+    epoch = get_epoch()
+    key = get_epoch_key(salt, epoch)
+
+    def write_frame(ct):
+        writer.write(pack_frame_length(len(ct)))
+        writer.write(ct)
+
+    writer.write(pack_stream_header(epoch))
+    with _open_blocks(reader, block_size) as blocks:
+        total = _run_stream(blocks, write_frame, encrypt_segment, key, max_in_flight)
+    writer.write(pack_frame_length(0))
+    return total
+
+
+# Streaming decryption of a PPE_stream output, returns the plaintext size (bytes written), as PPE_stream does
+def PPD_stream(reader, writer, salt, max_in_flight=None):
+    if isinstance(reader, (str, bytes, os.PathLike)):
+        with open(reader, 'rb') as f:
+            return PPD_stream(f, writer, salt, max_in_flight)
+
+    epoch = read_stream_header(reader)
+    key = get_ppe_key(salt) if epoch is None else get_header_key(salt, epoch)
+    written = 0
+
+    def write_block(data):
+        nonlocal written
+        written += len(data)
+        writer.write(data)
+
+    _run_stream(read_frames(reader), write_block, decrypt_segment, key, max_in_flight)
+    return written
 
 
 
@@ -0,0 +1,98 @@
+import base64
+
+import numpy as np
+
+from PPE import decrypt_containers, single_core_decrypt, get_ctr_cipher, new_aes_ecb, unpad, BLOCK_SIZE
+from container import is_container, is_seekable, unpack_segments, unpack_seekable, read_epoch, dearmor
+from bulk_keys import derive_keys, derive_back_keys, epochs_of
+from parallel_engine import get_engine
+
+
+# Ciphertext layouts of decrypt_archive: 'ppe' (this package) or 'back' (the older Back/Python/PPE.py)
+LAYOUTS = ('ppe', 'back')
+
+
+# Decrypt the messages of one (salt, epoch) group: one AES call for all its containers
+def decrypt_group(job):
+    key, members = job
+    results = []
+    containers = []
+    for index, blob in members:
+        if not is_container(blob):
+            parts = blob.decode('utf-8').split('~|~')
+            results.append((index, "".join(single_core_decrypt(part, key) for part in parts).encode('utf-8')))
+        elif is_seekable(blob):
+            _, nonce, body = unpack_seekable(blob)
+            results.append((index, get_ctr_cipher(key, nonce, 0).decrypt(body)))
+        else:
+            containers.append((index, unpack_segments(blob)))
+
+    plaintexts = decrypt_containers([parts for _, parts in containers], key)
+    results.extend((index, data) for (index, _), data in zip(containers, plaintexts))
+    return results
+
+
+# Decrypt the messages of one epoch of Back/Python/PPE.py: "~|~" halves, AES-192 ECB
+def decrypt_back_group(job):
+    key, members = job
+    cipher = new_aes_ecb(key)
+    results = []
+    for index, blob in members:
+        parts = blob.decode('utf-8').split('~|~')
+        results.append((index, b"".join(unpad(cipher.decrypt(base64.b64decode(part)), BLOCK_SIZE) for part in parts)))
+    return results
+
+
+# Decrypt archived PPE ciphertexts of any salts and epochs.
+#
+# records are (salt, ciphertext) or (salt, ciphertext, unix_time) tuples, ciphertext as armored
+# text or bytes. The epoch comes from the container header; version 1 and legacy "~|~"
+# ciphertexts carry none, for those unix_time (the encryption time) is required.
+# Messages are grouped by (salt, epoch), every key is derived once in one vectorized pass
+# and the groups are decrypted in parallel on the shared engine.
+#
+# layout='back' reads ciphertexts of the older Back/Python/PPE.py (AES-192, no header,
+# so every record needs its unix_time).
+def decrypt_archive(records, decode=True, layout='ppe'):
+    if layout not in LAYOUTS:
+        raise ValueError("unknown archive layout %r, expected one of %s" % (layout, ", ".join(LAYOUTS)))
+
+    salts, blobs, epochs, missing = [], [], [], []
+    for i, record in enumerate(records):
+        salt, ciphertext = record[0], record[1]
+        blob = dearmor(ciphertext) if isinstance(ciphertext, str) else bytes(ciphertext)
+        epoch = read_epoch(blob) if layout == 'ppe' and is_container(blob) else None
+        if epoch is None:
+            if len(record) < 3 or record[2] is None:
+                raise ValueError("record %d has no key epoch in its header, give its unix time" % i)
+            missing.append((i, record[2]))
+        salts.append(salt)
+        blobs.append(blob)
+        epochs.append(epoch or 0)
+
+    if missing:
+        for (i, _), epoch in zip(missing, epochs_of([unix_time for _, unix_time in missing])):
+            epochs[i] = int(epoch)
+
+    groups = {}
+    for i, pair in enumerate(zip(salts, epochs)):
+        groups.setdefault(pair, []).append(i)
+
+    pairs = list(groups)
+    pair_epochs = np.array([epoch for _, epoch in pairs], dtype=np.int64)
+    if layout == 'back':
+        # The salt never reaches a Back key, so it is one key per epoch
+        keys, decrypt = derive_back_keys(pair_epochs), decrypt_back_group
+    else:
+        keys, decrypt = derive_keys([salt for salt, _ in pairs], pair_epochs), decrypt_group
+    jobs = [(key, [(i, blobs[i]) for i in groups[pair]]) for key, pair in zip(keys, pairs)]
+
+    engine = get_engine()
+    results = [None] * len(blobs)
+    for group in engine.map(decrypt, jobs, parallel=engine.segments > 1):
+        for index, data in group:
+            results[index] = data
+
+    if decode:
+        return [data.decode('utf-8') for data in results]
+    return results
@@ -0,0 +1,213 @@
+import os
+import sys
+import threading
+from importlib.util import find_spec
+from time import perf_counter_ns
+
+
+# AES backends: pycryptodome (Crypto.Cipher) and cryptography (OpenSSL, AES-NI when the CPU has it).
+#
+# Both hand out ciphers with the pycryptodome calling convention:
+#   aes_ecb(key)         -> encrypt(data, output=None) / decrypt(data, output=None)
+#   aes_ctr(key, nonce, initial_block) -> the same, an 8 byte nonce followed by an 8 byte big-endian counter
+#
+# The backend is chosen on first use: PPE_BACKEND (or set_backend) when given, else the
+# result of an earlier micro-benchmark cached in PPE_BACKEND_CACHE (~/.cache/ppe/backend.json),
+# else a fresh micro-benchmark of every installed backend.
+ENV_BACKEND = "PPE_BACKEND"
+ENV_CACHE = "PPE_BACKEND_CACHE"
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "ppe", "backend.json")
+
+ALGORITHMS = ('aes-ecb', 'aes-ctr')
+BLOCK_SIZE = 16
+
+
+class PyCryptodomeBackend:
+    name = 'pycryptodome'
+    module = 'Crypto'
+
+    def version(self):
+        import Crypto
+        return Crypto.__version__
+
+    def aes_ecb(self, key):
+        from Crypto.Cipher import AES
+        return AES.new(key, AES.MODE_ECB)
+
+    def aes_ctr(self, key, nonce, initial_block=0):
+        from Crypto.Cipher import AES
+        return AES.new(key, AES.MODE_CTR, nonce=nonce, initial_value=initial_block)
+
+
+class _OpenSSLCipher:
+    __slots__ = ('_encryptor', '_decryptor', '_block_size')
+
+    def __init__(self, cipher, block_size):
+        self._encryptor = cipher.encryptor()
+        self._decryptor = cipher.decryptor() if block_size else self._encryptor
+        self._block_size = block_size
+
+    # ECB and stream contexts are never finalized: every whole-block update is complete on its own
+    def _update(self, context, data, output):
+        size = len(data)
+        if self._block_size and size % self._block_size:
+            raise ValueError("Data must be padded to 16 byte boundary in ECB mode")
+        if output is None:
+            return context.update(data)
+
+        # update_into writes straight into output but wants block_size - 1 spare bytes there;
+        # without them the last ECB block goes through update (the blocks are independent)
+        head = size
+        if self._block_size and len(output) < size + self._block_size - 1:
+            head = size - self._block_size
+        data = memoryview(data)
+        if head:
+            context.update_into(data[:head], output)
+        if head < size:
+            output[head:size] = context.update(data[head:])
+
+    def encrypt(self, data, output=None):
+        return self._update(self._encryptor, data, output)
+
+    def decrypt(self, data, output=None):
+        return self._update(self._decryptor, data, output)
+
+
+class CryptographyBackend:
+    name = 'cryptography'
+    module = 'cryptography'
+
+    def version(self):
+        import cryptography
+        return cryptography.__version__
+
+    def aes_ecb(self, key):
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        return _OpenSSLCipher(Cipher(algorithms.AES(key), modes.ECB()), BLOCK_SIZE)
+
+    def aes_ctr(self, key, nonce, initial_block=0):
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+        counter = bytes(nonce) + initial_block.to_bytes(BLOCK_SIZE - len(nonce), 'big')
+        return _OpenSSLCipher(Cipher(algorithms.AES(key), modes.CTR(counter)), 0)
+
+
+BACKENDS = {backend.name: backend for backend in (PyCryptodomeBackend(), CryptographyBackend())}
+
+_selected = {}
+_listeners = []
+_lock = threading.Lock()
+
+
+def available_backends():
+    return [name for name, backend in BACKENDS.items() if find_spec(backend.module) is not None]
+
+
+# Call listener() every time the backend changes (cached cipher objects must go)
+def add_backend_listener(listener):
+    _listeners.append(listener)
+
+
+# Force a backend for one algorithm (or all of them with algorithm=None), None goes back to auto-selection
+def set_backend(name, algorithm=None):
+    if name is not None and name not in BACKENDS:
+        raise ValueError("unknown cipher backend %r, expected one of %s" % (name, ", ".join(BACKENDS)))
+
+    with _lock:
+        for algo in ALGORITHMS if algorithm is None else (algorithm,):
+            if name is None:
+                _selected.pop(algo, None)
+            else:
+                _selected[algo] = BACKENDS[name]
+    for listener in _listeners:
+        listener()
+
+
+def get_backend(algorithm='aes-ecb'):
+    backend = _selected.get(algorithm)
+    if backend is not None:
+        return backend
+
+    with _lock:
+        backend = _selected.get(algorithm)
+        if backend is None:
+            backend = _selected[algorithm] = BACKENDS[select_backend(algorithm)]
+    return backend
+
+
+# Name of the backend to use for algorithm on this machine
+def select_backend(algorithm='aes-ecb'):
+    installed = available_backends()
+    if not installed:
+        raise ImportError("no cipher backend installed, install pycryptodome or cryptography")
+
+    override = os.environ.get(ENV_BACKEND)
+    if override:
+        if override not in installed:
+            raise ValueError("%s=%s but that backend is not installed" % (ENV_BACKEND, override))
+        return override
+    if len(installed) == 1:
+        return installed[0]
+
+    cache_path = os.environ.get(ENV_CACHE, DEFAULT_CACHE)
+    fingerprint = _fingerprint(installed)
+    cached = _read_cache(cache_path)
+    if cached.get('fingerprint') == fingerprint and cached.get(algorithm) in installed:
+        return cached[algorithm]
+
+    results = benchmark_backends(algorithm, installed)
+    name = max(results, key=results.get)
+    cached = cached if cached.get('fingerprint') == fingerprint else {'fingerprint': fingerprint}
+    cached[algorithm] = name
+    cached[algorithm + '_mb_per_s'] = results
+    _write_cache(cache_path, cached)
+    return name
+
+
+# Throughput (MB/s) of every backend on size bytes, best of rounds
+def benchmark_backends(algorithm='aes-ecb', names=None, size=64 * 1024, rounds=10):
+    key = bytes(range(16))
+    data = bytes(size)
+    results = {}
+    for name in names or available_backends():
+        backend = BACKENDS[name]
+        best = None
+        for _ in range(rounds):
+            start = perf_counter_ns()
+            if algorithm == 'aes-ecb':
+                backend.aes_ecb(key).encrypt(data)
+            else:
+                backend.aes_ctr(key, bytes(8)).encrypt(data)
+            elapsed = perf_counter_ns() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = size / 1e6 / (max(best, 1) / 1e9)
+    return results
+
+
+# A cached choice only holds for the same interpreter, CPU and library versions
+def _fingerprint(installed):
+    import platform
+
+    return "%s|%s|%s|%s" % (sys.version.split()[0], platform.machine(), platform.processor(),
+                            ",".join("%s=%s" % (name, BACKENDS[name].version()) for name in installed))
+
+
+def _read_cache(path):
+    import json
+
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+        return cached if isinstance(cached, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(path, cached):
+    import json
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(cached, f, indent=2)
+    except OSError:
+        pass
@@ -0,0 +1,105 @@
+import numpy as np
+
+
+# Vectorized key derivation for many (salt, epoch) pairs at once (archive reprocessing).
+#
+# The key characters only depend on the 8 epoch digits: the keybase is the digits, then
+# reversed/forward copies of them, and key character n is chr(10 * a + b) for the digit
+# pair (a, b) at keybase positions 2n and 2n + 1. Both are fixed index maps, so a whole array of
+# epochs turns into a (count, KEY_CHARS) array of character codes with one gather.
+EPOCH_DIGITS = 8
+KEYBASE_COPIES = 6
+KEY_CHARS = 26
+
+_B64_ALPHABET = np.frombuffer(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/", dtype=np.uint8)
+
+
+# Digit index (0 = most significant) behind every keybase position
+def _keybase_digits():
+    forward = list(range(EPOCH_DIGITS))
+    return forward + (forward[::-1] + forward) * KEYBASE_COPIES
+
+
+_KEYBASE = _keybase_digits()
+_TENS = np.array([_KEYBASE[i] for i in range(0, 2 * KEY_CHARS, 2)])
+_UNITS = np.array([_KEYBASE[i + 1] for i in range(0, 2 * KEY_CHARS, 2)])
+
+
+# Key epochs of unix times: their first 8 digits, as get_epoch does
+def epochs_of(unix_times):
+    times = np.asarray(unix_times, dtype=np.int64)
+    digits = np.searchsorted(10 ** np.arange(19, dtype=np.int64), times, side='right')
+    return times // 10 ** np.maximum(digits - EPOCH_DIGITS, 0)
+
+
+# (count, KEY_CHARS) uint8 array: the key character codes of every epoch
+def key_codes(epochs):
+    epochs = np.asarray(epochs, dtype=np.int64)
+    if epochs.size and (epochs.min() < 10 ** (EPOCH_DIGITS - 1) or epochs.max() >= 10 ** EPOCH_DIGITS):
+        raise ValueError("epochs must have exactly %d digits" % EPOCH_DIGITS)
+
+    digits = epochs.astype('S%d' % EPOCH_DIGITS).view(np.uint8).reshape(-1, EPOCH_DIGITS) - ord('0')
+    return digits[:, _TENS] * 10 + digits[:, _UNITS]
+
+
+# Base64 of every row of a (count, width) uint8 array, as a (count, 4 * ceil(width / 3)) uint8 array
+def b64encode_rows(rows):
+    count, width = rows.shape
+    padding = -width % 3
+    if padding:
+        rows = np.concatenate([rows, np.zeros((count, padding), dtype=np.uint8)], axis=1)
+
+    groups = rows.reshape(count, -1, 3)
+    first, second, third = groups[..., 0], groups[..., 1], groups[..., 2]
+    sextets = np.empty(groups.shape[:2] + (4,), dtype=np.uint8)
+    sextets[..., 0] = first >> 2
+    sextets[..., 1] = ((first & 3) << 4) | (second >> 4)
+    sextets[..., 2] = ((second & 15) << 2) | (third >> 6)
+    sextets[..., 3] = third & 63
+    encoded = _B64_ALPHABET[sextets.reshape(count, -1)]
+    if padding:
+        encoded[:, -padding:] = ord('=')
+    return encoded
+
+
+def _row_strings(rows):
+    width = rows.shape[1]
+    data = np.ascontiguousarray(rows).tobytes().decode('ascii')
+    return [data[i:i + width] for i in range(0, len(data), width)]
+
+
+# Keys of one salt for a (count, KEY_CHARS) array of key codes: base64(base64((salt + key)[:16]))
+def _salt_keys(salt, codes):
+    prefix = np.frombuffer(salt[:16].encode('utf-8'), dtype=np.uint8)
+    rows = np.concatenate([np.broadcast_to(prefix, (len(codes), len(prefix))),
+                           codes[:, :max(0, 16 - len(salt))]], axis=1)
+    return _row_strings(b64encode_rows(b64encode_rows(rows)))
+
+
+# Keys of PPE.get_epoch_key(salt, epoch) for every pair (salts may be a single salt)
+def derive_keys(salts, epochs):
+    epochs = np.asarray(epochs, dtype=np.int64).ravel()
+    codes = key_codes(epochs)
+    if isinstance(salts, str):
+        return _salt_keys(salts, codes)
+    if len(salts) != len(epochs):
+        raise ValueError("got %d salts for %d epochs" % (len(salts), len(epochs)))
+
+    # Every row of one salt has the same prefix and so the same width
+    by_salt = {}
+    for i, salt in enumerate(salts):
+        by_salt.setdefault(salt, []).append(i)
+
+    keys = [None] * len(epochs)
+    for salt, indices in by_salt.items():
+        for i, key in zip(indices, _salt_keys(salt, codes[indices])):
+            keys[i] = key
+    return keys
+
+
+# AES-192 keys of the older Back/Python/PPE.py for every epoch: (key + salt)[:24], space padded.
+# Its 26 key characters already fill the 24, so the salt never reaches the AES key.
+def derive_back_keys(epochs):
+    codes = key_codes(np.asarray(epochs, dtype=np.int64).ravel())[:, :24]
+    data = np.ascontiguousarray(codes).tobytes()
+    return [data[i:i + 24] for i in range(0, len(data), 24)]
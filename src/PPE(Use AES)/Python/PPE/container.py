@@ -0,0 +1,204 @@
+import base64
+import struct
+
+
+# Binary PPE container:
+#
+#   header byte    FORMAT_MARK | version
+#   epoch          4 byte big-endian key epoch (first 8 digits of the unix time), version 2 only
+#   segment count  1 byte
+#   segments       4 byte big-endian length + raw ciphertext, repeated
+#
+# Legacy text ciphertexts (base64 segments joined with "~|~") always start with a
+# base64 character (< 0x80), so the header byte alone tells the two formats apart.
+# Version 1 has no epoch: its key is the one of the current time, as for legacy text.
+FORMAT_MARK = 0xE0
+FORMAT_VERSION = 2
+MAX_SEGMENTS = 255
+
+_HEADER_V1 = struct.Struct(">BB")
+_HEADER_V2 = struct.Struct(">BIB")
+_LENGTH = struct.Struct(">I")
+
+
+# Seekable (AES-CTR) container:
+#
+#   header byte    FORMAT_MARK | 3
+#   epoch          4 byte big-endian key epoch
+#   nonce          8 random bytes, the counter block is nonce + 8 byte big-endian block index
+#   ciphertext     as long as the plaintext, byte i is at offset SEEKABLE_HEADER_SIZE + i
+SEEKABLE_VERSION = 3
+NONCE_SIZE = 8
+
+_HEADER_V3 = struct.Struct(">BI%ds" % NONCE_SIZE)
+SEEKABLE_HEADER_SIZE = _HEADER_V3.size
+
+
+# PPE stream:
+#
+#   header         STREAM_MAGIC + version byte (+ 4 byte key epoch from version 2 on)
+#   frames         4 byte big-endian length + raw ciphertext of one block, repeated
+#   end            a zero length frame
+STREAM_MAGIC = b"PPES"
+STREAM_VERSION = 2
+
+_EPOCH = struct.Struct(">I")
+
+
+class ContainerError(ValueError):
+    pass
+
+
+# Is blob a binary container (and not a legacy "~|~" ciphertext)
+def is_container(blob):
+    return len(blob) > 0 and blob[0] & 0xF0 == FORMAT_MARK
+
+
+def _pack_header(count, epoch):
+    if not 0 < count <= MAX_SEGMENTS:
+        raise ContainerError("a container holds 1 to %d segments, got %d" % (MAX_SEGMENTS, count))
+    if epoch is None:
+        return _HEADER_V1.pack(FORMAT_MARK | 1, count)
+    return _HEADER_V2.pack(FORMAT_MARK | 2, epoch, count)
+
+
+# Returns (epoch or None, segment count, offset of the first segment)
+def _parse_header(view):
+    if not is_container(view):
+        raise ContainerError("not a PPE container")
+
+    version = view[0] & 0x0F
+    if version == 1 and len(view) >= _HEADER_V1.size:
+        _, count = _HEADER_V1.unpack_from(view, 0)
+        return None, count, _HEADER_V1.size
+    if version == 2 and len(view) >= _HEADER_V2.size:
+        _, epoch, count = _HEADER_V2.unpack_from(view, 0)
+        return epoch, count, _HEADER_V2.size
+    if version in (1, 2):
+        raise ContainerError("truncated PPE container")
+    if version == SEEKABLE_VERSION:
+        raise ContainerError("seekable PPE container, it has no segments")
+    raise ContainerError("unsupported PPE container version %d" % version)
+
+
+# Key epoch recorded in a container, None for version 1
+def read_epoch(blob):
+    view = memoryview(blob)
+    if is_seekable(view):
+        epoch, _, _ = unpack_seekable(view)
+        return epoch
+    epoch, _, _ = _parse_header(view)
+    return epoch
+
+
+# Frame raw ciphertext segments into one container
+def pack_segments(segments, epoch=None):
+    parts = [_pack_header(len(segments), epoch)]
+    for segment in segments:
+        parts.append(_LENGTH.pack(len(segment)))
+        parts.append(segment)
+    return b"".join(parts)
+
+
+# Preallocate a container for segments of the given lengths, returns (buffer, writable segment views)
+def allocate_segments(lengths, epoch=None):
+    header = _pack_header(len(lengths), epoch)
+    buffer = bytearray(len(header) + sum(_LENGTH.size + length for length in lengths))
+    view = memoryview(buffer)
+    view[:len(header)] = header
+
+    segments = []
+    offset = len(header)
+    for length in lengths:
+        _LENGTH.pack_into(buffer, offset, length)
+        offset += _LENGTH.size
+        segments.append(view[offset:offset + length])
+        offset += length
+    return buffer, segments
+
+
+# Split a container back into its segments (memoryviews into blob, nothing is copied)
+def unpack_segments(blob):
+    view = memoryview(blob)
+    _, count, offset = _parse_header(view)
+
+    segments = []
+    for _ in range(count):
+        if offset + _LENGTH.size > len(view):
+            raise ContainerError("truncated PPE container")
+        (length,) = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size
+        if offset + length > len(view):
+            raise ContainerError("truncated PPE container")
+        segments.append(view[offset:offset + length])
+        offset += length
+    return segments
+
+
+def is_seekable(blob):
+    return len(blob) > 0 and blob[0] == FORMAT_MARK | SEEKABLE_VERSION
+
+
+# Preallocate a seekable container for length plaintext bytes, returns (buffer, writable ciphertext view)
+def allocate_seekable(length, epoch, nonce):
+    buffer = bytearray(SEEKABLE_HEADER_SIZE + length)
+    _HEADER_V3.pack_into(buffer, 0, FORMAT_MARK | SEEKABLE_VERSION, epoch, nonce)
+    return buffer, memoryview(buffer)[SEEKABLE_HEADER_SIZE:]
+
+
+# Returns (epoch, nonce, ciphertext memoryview into blob)
+def unpack_seekable(blob):
+    view = memoryview(blob)
+    if not is_seekable(view):
+        raise ContainerError("not a seekable PPE container")
+    if len(view) < SEEKABLE_HEADER_SIZE:
+        raise ContainerError("truncated PPE container")
+    _, epoch, nonce = _HEADER_V3.unpack_from(view, 0)
+    return epoch, nonce, view[SEEKABLE_HEADER_SIZE:]
+
+
+def pack_stream_header(epoch):
+    return STREAM_MAGIC + bytes([STREAM_VERSION]) + _EPOCH.pack(epoch)
+
+
+def pack_frame_length(length):
+    return _LENGTH.pack(length)
+
+
+# Read exactly size bytes from a file-like object
+def read_exact(reader, size):
+    data = reader.read(size)
+    if data is None or len(data) != size:
+        raise ContainerError("truncated PPE stream")
+    return data
+
+
+# Check the stream header, returns its key epoch (None for version 1)
+def read_stream_header(reader):
+    header = read_exact(reader, len(STREAM_MAGIC) + 1)
+    if header[:len(STREAM_MAGIC)] != STREAM_MAGIC:
+        raise ContainerError("not a PPE stream")
+    if header[-1] == 1:
+        return None
+    if header[-1] != STREAM_VERSION:
+        raise ContainerError("unsupported PPE stream version %d" % header[-1])
+    (epoch,) = _EPOCH.unpack(read_exact(reader, _EPOCH.size))
+    return epoch
+
+
+# Yield the frame payloads of a stream until its end frame
+def read_frames(reader):
+    while True:
+        (length,) = _LENGTH.unpack(read_exact(reader, _LENGTH.size))
+        if length == 0:
+            return
+        yield read_exact(reader, length)
+
+
+# Single-pass text armor for transports that only carry text
+def armor(blob):
+    return base64.b64encode(blob).decode('ascii')
+
+
+def dearmor(text):
+    return base64.b64decode(text)
@@ -0,0 +1,85 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Heavy dependencies that must stay out of "import PPE"
+LAZY_MODULES = ["requests", "Crypto", "cryptography", "multiprocessing", "concurrent.futures", "asyncio"]
+
+
+# Run "python -X importtime -c 'import <module>'" in a fresh interpreter
+def measure_once(module):
+    code = "import sys, json, %s; print(json.dumps(sorted(sys.modules)))" % module
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=HERE, capture_output=True, text=True, check=True)
+
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+
+    return timings, json.loads(result.stdout.splitlines()[-1])
+
+
+def benchmark(module, runs, lazy_modules=LAZY_MODULES):
+    totals = []
+    timings = modules = None
+    for _ in range(runs):
+        timings, modules = measure_once(module)
+        totals.append(timings[module][1])
+
+    loaded = [name for name in lazy_modules if name in modules]
+    heaviest = sorted(timings.items(), key=lambda item: item[1][0], reverse=True)[:10]
+    return {
+        'module': module,
+        'runs': runs,
+        'cumulative_us_median': int(statistics.median(totals)),
+        'cumulative_us_min': min(totals),
+        'eagerly_loaded': loaded,
+        'heaviest_self_us': [{'module': name, 'self_us': t[0], 'cumulative_us': t[1]} for name, t in heaviest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time benchmark of the PPE module (python -X importtime)")
+    parser.add_argument("--module", default="PPE")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=None, help="fail when the median import time is higher")
+    parser.add_argument("--lazy", default=",".join(LAZY_MODULES),
+                        help="comma separated modules that must not be imported at import time")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    # The first run also writes the __pycache__ files, it is not counted
+    measure_once(args.module)
+    report = benchmark(args.module, args.runs, [name for name in args.lazy.split(",") if name])
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print("import %s: median %.2f ms, min %.2f ms over %d runs" % (
+            args.module, report['cumulative_us_median'] / 1000, report['cumulative_us_min'] / 1000, args.runs))
+        for entry in report['heaviest_self_us']:
+            print("  %-30s self %8d us  cumulative %8d us" % (entry['module'], entry['self_us'], entry['cumulative_us']))
+
+    failed = False
+    if report['eagerly_loaded']:
+        print("FAIL: imported at import time: %s" % ", ".join(report['eagerly_loaded']), file=sys.stderr)
+        failed = True
+    if args.max_ms is not None and report['cumulative_us_median'] > args.max_ms * 1000:
+        print("FAIL: import takes %.2f ms, limit is %.2f ms" % (report['cumulative_us_median'] / 1000, args.max_ms),
+              file=sys.stderr)
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+import threading
+import weakref
+from collections import OrderedDict, deque
+
+
+class EpochKeyCache:
+    """Thread-safe bounded LRU of derived keys, keyed by (salt, timestep8).
+
+    A key is only valid for one epoch (the first 8 digits of the unix time,
+    i.e. 100 seconds), so every entry of an older epoch is dropped as soon as
+    a newer epoch is seen. Only lookups with advance=True (the local clock)
+    start a newer epoch: an epoch read from a ciphertext is looked up as is.
+    """
+
+    def __init__(self, max_size=4096):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._current_epoch = None
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    # Call listener() every time a newer epoch starts
+    def add_epoch_listener(self, listener):
+        self._listeners.append(listener)
+
+    # Return the cached key for (salt, timestep8), deriving it with derive(salt, timestep8) on a miss
+    def get(self, salt, timestep8, derive, advance=True):
+        cache_key = (salt, timestep8)
+        with self._lock:
+            if advance:
+                self._advance_epoch(int(timestep8))
+            key = self._entries.get(cache_key)
+            if key is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return key
+            self.misses += 1
+
+        # Derive outside the lock, two threads racing on a miss produce the same key
+        key = derive(salt, timestep8)
+
+        with self._lock:
+            self._entries[cache_key] = key
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return key
+
+    # Drop every entry of an epoch that has ended (caller holds the lock)
+    def _advance_epoch(self, epoch):
+        if self._current_epoch is not None and epoch <= self._current_epoch:
+            return
+        self._current_epoch = epoch
+        stale = [k for k in self._entries if int(k[1]) < epoch]
+        for k in stale:
+            del self._entries[k]
+        self.evictions += len(stale)
+        for listener in self._listeners:
+            listener()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._current_epoch = None
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _Counters:
+    __slots__ = ('hits', 'misses', 'evictions')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class _ThreadCiphers:
+    def __init__(self, generation):
+        self.generation = generation
+        self.entries = OrderedDict()
+        self.counts = _Counters()
+
+
+class CipherCache:
+    """Per-thread bounded LRU of ready cipher objects, so each key schedule is expanded once.
+
+    Cipher objects are not thread-safe, so every thread keeps its own entries.
+    new_epoch() drops them all (lazily, on each thread's next lookup).
+    The counters of a thread outlive it: when its state goes they are queued and
+    folded into the cache totals, so stats() covers thread-per-request callers too.
+    """
+
+    def __init__(self, factory, max_size=64):
+        self.factory = factory  # key -> cipher object
+        self.max_size = max_size
+        self._generation = 0
+        self._local = threading.local()
+        self._threads = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._totals = _Counters()
+        # Counters of threads that exited, appended by their finalizer (no lock taken there)
+        self._retired = deque()
+
+    def _state(self):
+        state = getattr(self._local, 'state', None)
+        if state is None:
+            state = _ThreadCiphers(self._generation)
+            self._local.state = state
+            weakref.finalize(state, self._retired.append, state.counts)
+            with self._lock:
+                self._threads.add(state)
+                self._fold_retired()
+        elif state.generation != self._generation:
+            state.counts.evictions += len(state.entries)
+            state.entries.clear()
+            state.generation = self._generation
+        return state
+
+    # Add the counters of exited threads to the totals (caller holds the lock)
+    def _fold_retired(self):
+        while self._retired:
+            counts = self._retired.popleft()
+            self._totals.hits += counts.hits
+            self._totals.misses += counts.misses
+            self._totals.evictions += counts.evictions
+
+    def get(self, key):
+        state = self._state()
+        cipher = state.entries.get(key)
+        if cipher is not None:
+            state.entries.move_to_end(key)
+            state.counts.hits += 1
+            return cipher
+
+        state.counts.misses += 1
+        cipher = self.factory(key)
+        state.entries[key] = cipher
+        if len(state.entries) > self.max_size:
+            state.entries.popitem(last=False)
+            state.counts.evictions += 1
+        return cipher
+
+    # The epoch ended, every thread drops its ciphers
+    def new_epoch(self):
+        self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            self._fold_retired()
+            states = list(self._threads)
+            hits = self._totals.hits + sum(state.counts.hits for state in states)
+            misses = self._totals.misses + sum(state.counts.misses for state in states)
+            evictions = self._totals.evictions + sum(state.counts.evictions for state in states)
+        total = hits + misses
+        return {
+            'threads': len(states),
+            'size': sum(len(state.entries) for state in states),
+            'hits': hits,
+            'misses': misses,
+            'evictions': evictions,
+            'reuse_rate': hits / total if total else 0.0,
+        }
@@ -0,0 +1,96 @@
+import os
+import atexit
+import threading
+
+
+# Smallest segment worth handing to another worker
+MIN_SEGMENT_SIZE = 64 * 1024
+
+
+class ParallelEngine:
+    """Persistent worker pool shared by every PPE/PPD call."""
+
+    def __init__(self, segments=None, use_processes=False, min_segment_size=MIN_SEGMENT_SIZE):
+        self.segments = max(1, segments or os.cpu_count() or 2)
+        self.use_processes = use_processes  # Process pool instead of thread pool
+        self.min_segment_size = min_segment_size
+        self._pool = None
+        self._lock = threading.Lock()
+
+    # Create the pool once and keep it for the life of the engine
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+                    executor = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+                    self._pool = executor(max_workers=self.segments)
+        return self._pool
+
+    # Number of segments for a payload, never less than the two halves of the original scheme
+    def segment_count(self, size):
+        wanted = min(self.segments, size // self.min_segment_size)
+        return max(2, wanted)
+
+    # Is the payload big enough to be worth dispatching to the pool
+    def is_parallel(self, size):
+        return self.segments > 1 and size >= 2 * self.min_segment_size
+
+    # Split data into count nearly equal slices (count=2 gives the classic left/right halves)
+    def split(self, data, count):
+        size = len(data)
+        bounds = [size * i // count for i in range(count + 1)]
+        return [data[bounds[i]:bounds[i + 1]] for i in range(count)]
+
+    # Run func(item, *args) for every item, in order
+    def map(self, func, items, *args, parallel=True):
+        if not parallel or len(items) < 2:
+            return [func(item, *args) for item in items]
+
+        futures = [self.submit(func, item, *args) for item in items]
+        return [future.result() for future in futures]
+
+    # Run func(*args) on the pool, returns a future
+    def submit(self, func, *args):
+        # Child processes cannot receive memoryviews
+        if self.use_processes:
+            args = tuple(bytes(arg) if isinstance(arg, memoryview) else arg for arg in args)
+
+        return self._get_pool().submit(func, *args)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+# Shared engine used by multi_core_encrypt / multi_core_decrypt
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = ParallelEngine()
+    return _engine
+
+
+# Replace the shared engine, e.g. configure_engine(segments=32)
+def configure_engine(**kwargs):
+    global _engine
+    with _engine_lock:
+        old = _engine
+        _engine = ParallelEngine(**kwargs)
+    if old is not None:
+        old.shutdown()
+    return _engine
+
+
+@atexit.register
+def _shutdown_engine():
+    if _engine is not None:
+        _engine.shutdown()
@@ -0,0 +1,76 @@
+import os
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import PPE
+from time_source import get_time_source
+from container import is_container, read_epoch, dearmor
+
+
+# Payloads smaller than this are encrypted on the event loop itself
+INLINE_THRESHOLD = 64 * 1024
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# One in-flight time sync per event loop, shared by every waiting coroutine
+_sync_futures = {}
+
+
+# Executor for blocking work (time sync, large payloads), separate from the engine pool
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 2, thread_name_prefix="ppe-async")
+    return _executor
+
+
+# Current unix time without blocking the loop, concurrent first lookups share one request
+async def get_unix_time_async():
+    source = get_time_source()
+    loop = asyncio.get_running_loop()
+    future = _sync_futures.get(loop)
+    if future is None and not source.synced_event.is_set():
+        if source.needs_sync:
+            future = loop.run_in_executor(get_executor(), source.sync)
+        else:
+            # Another thread is doing the first sync, now() would wait for it on the loop
+            future = loop.run_in_executor(get_executor(), source.synced_event.wait, source.timeout + 1)
+        _sync_futures[loop] = future
+        future.add_done_callback(lambda _: _sync_futures.pop(loop, None))
+    if future is not None:
+        await asyncio.shield(future)
+    return int(source.now())
+
+
+async def _run(func, size, *args):
+    if size < INLINE_THRESHOLD:
+        return func(*args)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args))
+
+
+async def PPE_async(inp, salt, armored=True, format='container'):
+    if format not in PPE.FORMATS:
+        raise ValueError("unknown PPE format %r, expected one of %s" % (format, ", ".join(PPE.FORMATS)))
+    epoch = PPE.get_epoch(await get_unix_time_async())
+    key = PPE.get_epoch_key(salt, epoch)
+    if format == 'legacy':
+        return await _run(PPE.legacy_multi_core_encrypt, len(inp), inp, key)
+    return await _run(PPE.multi_core_encrypt, len(inp), inp, key, None, armored, epoch)
+
+
+async def PPD_async(inp, salt):
+    blob = dearmor(inp) if isinstance(inp, str) else inp
+
+    # Version 1 and legacy ciphertexts use the key of now, the others the epoch they carry (checked against now)
+    epoch = read_epoch(blob) if is_container(blob) else None
+    if epoch is None:
+        key = PPE.get_ppe_key(salt, await get_unix_time_async())
+    else:
+        key = PPE.get_header_key(salt, epoch, await get_unix_time_async())
+    return await _run(PPE.multi_core_decrypt, len(blob), blob, key)
@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import platform
+from time import perf_counter_ns
+
+import PPE
+from parallel_engine import get_engine
+from backends import get_backend
+from time_source import TimeSource, set_time_source
+
+
+# 16 B ... 64 MB
+DEFAULT_SIZES = [16, 256, 4 * 1024, 64 * 1024, 1024 * 1024, 16 * 1024 * 1024, 64 * 1024 * 1024]
+SALT = "reza"
+CASES = ['PPE', 'PPD', 'PPE_bytes', 'PPD_bytes', 'multi_core_encrypt', 'multi_core_decrypt',
+         'single_core_encrypt', 'single_core_decrypt']
+
+
+# Same payload of the same size on every run and every machine
+def make_payload(size):
+    data = bytearray()
+    counter = 0
+    while len(data) < size:
+        data += hashlib.sha256(b"PPE benchmark %d" % counter).hexdigest().encode('ascii')
+        counter += 1
+    return bytes(data[:size])
+
+
+# case name -> (setup(payload) -> args, timed function)
+def build_cases():
+    key = PPE.get_ppe_key(SALT)
+
+    def text(payload):
+        return payload.decode('ascii')
+
+    return {
+        'PPE': (lambda p: (text(p), SALT), PPE.PPE),
+        'PPD': (lambda p: (PPE.PPE(text(p), SALT), SALT), PPE.PPD),
+        'PPE_bytes': (lambda p: (p, SALT), PPE.PPE_bytes),
+        'PPD_bytes': (lambda p: (PPE.PPE_bytes(p, SALT), SALT), PPE.PPD_bytes),
+        'multi_core_encrypt': (lambda p: (text(p), key), PPE.multi_core_encrypt),
+        'multi_core_decrypt': (lambda p: (PPE.multi_core_encrypt(text(p), key), key), PPE.multi_core_decrypt),
+        'single_core_encrypt': (lambda p: (text(p), key), PPE.single_core_encrypt),
+        'single_core_decrypt': (lambda p: (PPE.single_core_encrypt(text(p), key), key), PPE.single_core_decrypt),
+    }
+
+
+# Nearest-rank percentile of sorted samples
+def percentile(samples, q):
+    rank = max(1, -(-len(samples) * q // 100))
+    return samples[int(rank) - 1]
+
+
+def run_case(func, args, size, warmup, min_runs, max_runs, min_time):
+    for _ in range(warmup):
+        func(*args)
+
+    samples = []
+    deadline = perf_counter_ns() + int(min_time * 1e9)
+    while len(samples) < max_runs and (len(samples) < min_runs or perf_counter_ns() < deadline):
+        start = perf_counter_ns()
+        func(*args)
+        samples.append(perf_counter_ns() - start)
+
+    samples.sort()
+    p50 = percentile(samples, 50)
+    return {
+        'size': size,
+        'runs': len(samples),
+        'min_ns': samples[0],
+        'mean_ns': sum(samples) // len(samples),
+        'p50_ns': p50,
+        'p95_ns': percentile(samples, 95),
+        'p99_ns': percentile(samples, 99),
+        'max_ns': samples[-1],
+        'mb_per_s': size / 1e6 / (p50 / 1e9) if p50 else 0.0,
+    }
+
+
+def cpu_model():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def capture_environment():
+    backend = get_backend('aes-ecb')
+    engine = get_engine()
+    return {
+        'cpu_model': cpu_model(),
+        'cpu_count': os.cpu_count(),
+        'machine': platform.machine(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'backend': "%s %s" % (backend.name, backend.version()),
+        'engine': {
+            'segments': engine.segments,
+            'use_processes': engine.use_processes,
+            'min_segment_size': engine.min_segment_size,
+        },
+        'timestamp': int(time.time()),
+    }
+
+
+def benchmark(cases, sizes, warmup=3, min_runs=5, max_runs=10000, min_time=1.0, progress=None):
+    available = build_cases()
+    results = []
+    for size in sizes:
+        payload = make_payload(size)
+        for name in cases:
+            setup, func = available[name]
+            result = run_case(func, setup(payload), size, warmup, min_runs, max_runs, min_time)
+            result['case'] = name
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return {'environment': capture_environment(), 'results': results}
+
+
+# Compare the p50 of every (case, size) found in both reports
+def compare(report, baseline, threshold):
+    previous = {(r['case'], r['size']): r for r in baseline['results']}
+    comparison = []
+    for result in report['results']:
+        old = previous.get((result['case'], result['size']))
+        if old is None or not old['p50_ns']:
+            continue
+        change = result['p50_ns'] / old['p50_ns'] - 1
+        comparison.append({
+            'case': result['case'],
+            'size': result['size'],
+            'baseline_p50_ns': old['p50_ns'],
+            'p50_ns': result['p50_ns'],
+            'change': change,
+            'regression': change > threshold,
+        })
+    return comparison
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            return "%d %s" % (size, unit)
+        size //= 1024
+
+
+def print_result(result):
+    print("%-20s %8s  runs %6d  p50 %12.1f us  p95 %12.1f us  p99 %12.1f us  %9.2f MB/s" % (
+        result['case'], format_size(result['size']), result['runs'],
+        result['p50_ns'] / 1000, result['p95_ns'] / 1000, result['p99_ns'] / 1000, result['mb_per_s']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PPE/PPD macro-benchmark over payload sizes")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="comma separated payload sizes in bytes")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma separated cases to run")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--min-runs", type=int, default=5)
+    parser.add_argument("--max-runs", type=int, default=10000)
+    parser.add_argument("--min-time", type=float, default=1.0, help="seconds spent on every case and size")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="p50 slowdown (0.10 = 10%%) counted as a regression")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    # The local clock, no HTTP round trip inside (or before) the timed calls
+    set_time_source(TimeSource(None))
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    cases = [name for name in args.cases.split(",") if name]
+    report = benchmark(cases, sizes, args.warmup, args.min_runs, args.max_runs, args.min_time,
+                       progress=None if args.json else print_result)
+
+    failed = False
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report['comparison'] = compare(report, baseline, args.threshold)
+        regressions = [entry for entry in report['comparison'] if entry['regression']]
+        if not args.json:
+            for entry in report['comparison']:
+                print("%-20s %8s  p50 %+7.1f%%%s" % (entry['case'], format_size(entry['size']),
+                                                      entry['change'] * 100,
+                                                      "  REGRESSION" if entry['regression'] else ""))
+        if regressions:
+            print("FAIL: %d regressions over %.0f%%" % (len(regressions), args.threshold * 100), file=sys.stderr)
+            failed = True
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+import threading
+from time import perf_counter_ns
+
+
+# Stages a PPE/PPD call is split into
+STAGES = ('time', 'key', 'split', 'aes', 'join', 'base64')
+
+
+class Histogram:
+    """Durations in power-of-two nanosecond buckets (bucket n holds [2**(n-1), 2**n) ns)."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.buckets = {}
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+        bucket = value.bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    # Upper bound of the bucket holding the q-quantile
+    def quantile(self, q):
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2 ** bucket, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_ns': self.total,
+            'mean_ns': self.total // self.count if self.count else 0,
+            'min_ns': self.min or 0,
+            'max_ns': self.max,
+            'p50_ns': self.quantile(0.50),
+            'p99_ns': self.quantile(0.99),
+            'buckets': {str(2 ** bucket): n for bucket, n in sorted(self.buckets.items())},
+        }
+
+
+class CallTimer:
+    """Stage timings of one PPE/PPD call: mark(stage) charges the time since the previous mark."""
+
+    __slots__ = ('op', 'stages', 'nbytes', 'segments', '_last')
+
+    def __init__(self, op):
+        self.op = op
+        self.stages = {}
+        self.nbytes = 0
+        self.segments = 0
+        self._last = perf_counter_ns()
+
+    def mark(self, stage):
+        now = perf_counter_ns()
+        self.stages[stage] = self.stages.get(stage, 0) + now - self._last
+        self._last = now
+
+
+class PPEStats:
+    """Per-operation, per-stage histograms of PPE/PPD calls, dumpable as JSON.
+
+    callback, when given, also receives every call as a dict.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._ops = {}
+
+    def record(self, timer):
+        with self._lock:
+            op = self._ops.get(timer.op)
+            if op is None:
+                op = self._ops[timer.op] = {'calls': 0, 'bytes': 0, 'segments': 0, 'total': Histogram(), 'stages': {}}
+            op['calls'] += 1
+            op['bytes'] += timer.nbytes
+            op['segments'] += timer.segments
+            op['total'].add(sum(timer.stages.values()))
+            for stage, ns in timer.stages.items():
+                histogram = op['stages'].get(stage)
+                if histogram is None:
+                    histogram = op['stages'][stage] = Histogram()
+                histogram.add(ns)
+
+        if self.callback is not None:
+            self.callback({'op': timer.op, 'stages_ns': dict(timer.stages),
+                           'bytes': timer.nbytes, 'segments': timer.segments})
+
+    def reset(self):
+        with self._lock:
+            self._ops.clear()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                name: {
+                    'calls': op['calls'],
+                    'bytes': op['bytes'],
+                    'segments': op['segments'],
+                    'total': op['total'].to_dict(),
+                    'stages': {stage: op['stages'][stage].to_dict() for stage in STAGES if stage in op['stages']},
+                }
+                for name, op in self._ops.items()
+            }
+
+    def to_json(self, **kwargs):
+        import json
+
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def dump(self, path):
+        with open(path, 'w') as f:
+            f.write(self.to_json(indent=2))
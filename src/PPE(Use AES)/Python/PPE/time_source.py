@@ -0,0 +1,144 @@
+import time
+import threading
+
+
+DEFAULT_ENDPOINT = "https://worldtimeapi.org/api/timezone/asia/tehran"
+
+
+class TimeSource:
+    """Online unix time, synced once and then kept as an offset against time.monotonic().
+
+    endpoint must answer with a JSON object holding 'unixtime' (worldtimeapi.org,
+    PPETimeSyncer/index.php or a local stand-in server). With endpoint=None, or
+    while no sync has succeeded yet, the local clock is used.
+    """
+
+    def __init__(self, endpoint=DEFAULT_ENDPOINT, timeout=2.0, resync_interval=600.0, retry_interval=30.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.resync_interval = resync_interval
+        self.retry_interval = retry_interval
+        self.offset = None  # remote unix time - time.monotonic()
+        self.synced_at = None
+        self.last_error = None
+        self._attempted = False
+        self._first_sync = threading.Event()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Fetch the remote unix time (one HTTP round trip, bounded by timeout)
+    def fetch(self):
+        # requests is only imported once a sync actually happens
+        import requests
+
+        response = requests.get(self.endpoint, timeout=self.timeout)
+        try:
+            if response.status_code != 200:
+                raise ValueError("time endpoint answered %d" % response.status_code)
+            return float(response.json()['unixtime'])
+        finally:
+            response.close()
+
+    # Sync the offset once, returns False (and keeps the old offset) on failure
+    def sync(self):
+        self._attempted = True
+        if self.endpoint is None:
+            self._first_sync.set()
+            return False
+
+        try:
+            sent = time.monotonic()
+            remote = self.fetch()
+            received = time.monotonic()
+        except Exception as e:
+            self.last_error = e
+            self._first_sync.set()
+            return False
+
+        # Assume the server stamped its answer in the middle of the round trip
+        with self._lock:
+            self.offset = remote - (sent + received) / 2
+            self.synced_at = received
+            self.last_error = None
+        self._first_sync.set()
+        return True
+
+    @property
+    def synced(self):
+        return self.offset is not None
+
+    # True until the first sync has been attempted, i.e. now() would block on the network
+    @property
+    def needs_sync(self):
+        return not self._attempted
+
+    # Set once the first sync attempt is over (whether it worked or not), now() never blocks after that
+    @property
+    def synced_event(self):
+        return self._first_sync
+
+    # Current unix time, no network access once synced
+    def now(self):
+        if not self._first_sync.is_set():
+            with self._lock:
+                first = not self._attempted
+                self._attempted = True
+            if first:
+                self.sync()
+            else:
+                # Another caller is doing the first sync, wait for it rather than use the local clock
+                self._first_sync.wait(self.timeout + 1)
+
+        offset = self.offset
+        if offset is None:
+            return time.time()
+        return offset + time.monotonic()
+
+    # Resync in a daemon thread every resync_interval seconds
+    def start(self):
+        if self._thread is not None or self.endpoint is None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="ppe-time-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.timeout + 1)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            interval = self.resync_interval if self.synced else self.retry_interval
+            if self._stop.wait(interval):
+                return
+            self.sync()
+
+
+_source = None
+_source_lock = threading.Lock()
+
+
+# Shared time source used by get_unix_time
+def get_time_source():
+    global _source
+    if _source is None:
+        with _source_lock:
+            if _source is None:
+                _source = TimeSource()
+                _source.start()
+    return _source
+
+
+# Replace the shared time source, e.g. set_time_source(TimeSource("http://127.0.0.1:8000/"))
+def set_time_source(source):
+    global _source
+    with _source_lock:
+        old = _source
+        _source = source
+    source.start()
+    if old is not None and old is not source:
+        old.stop()
+    return source
@@ -460,53 +460,42 @@ def esp32_algorithm_benchmark():
     
     return results
 
+ALGORITHM_NAMES = {"ppe": "PPE", "aes": "AES-128", "rsa": "RSA-2048", "ppec": "PPEC"}
+ALGORITHM_COLORS = {"ppe": "skyblue", "aes": "lightgreen", "rsa": "lightcoral", "ppec": "plum"}
+
+def result_algorithms(results):
+    """Algorithms found in results: PPE, AES and RSA when simulated, what the board measured when loaded from CSV"""
+    found = {algorithm for algo_results in results.values() for algorithm in algo_results}
+    return sorted(found, key=lambda algorithm: list(ALGORITHM_NAMES).index(algorithm))
+
 def plot_algorithm_comparison_charts(results):
     """Create comparison charts for all algorithms"""
     
-    algorithms = ["ppe", "aes", "rsa"]
-    algorithm_names = {"ppe": "PPE", "aes": "AES-128", "rsa": "RSA-2048"}
-    colors = {"ppe": "skyblue", "aes": "lightgreen", "rsa": "lightcoral"}
+    algorithms = result_algorithms(results)
+    algorithm_names = ALGORITHM_NAMES
+    colors = ALGORITHM_COLORS
     
     # Prepare data
-    sizes = []
-    ppe_times = []
-    aes_times = []
-    rsa_times = []
-    ppe_memory = []
-    aes_memory = []
-    rsa_memory = []
+    sizes = list(results)
+    times = {algorithm: [] for algorithm in algorithms}
+    memory = {algorithm: [] for algorithm in algorithms}
     
     for size_name, algo_results in results.items():
-        sizes.append(size_name)
-        
-        # Time data
-        ppe_time = algo_results.get("ppe", {}).get('total_time', 0) if algo_results.get("ppe") else 0
-        aes_time = algo_results.get("aes", {}).get('total_time', 0) if algo_results.get("aes") else 0
-        rsa_time = algo_results.get("rsa", {}).get('total_time', 0) if algo_results.get("rsa") else 0
-        
-        ppe_times.append(ppe_time)
-        aes_times.append(aes_time)
-        rsa_times.append(rsa_time)
-        
-        # Memory data
-        ppe_mem = algo_results.get("ppe", {}).get('memory_usage', 0) if algo_results.get("ppe") else 0
-        aes_mem = algo_results.get("aes", {}).get('memory_usage', 0) if algo_results.get("aes") else 0
-        rsa_mem = algo_results.get("rsa", {}).get('memory_usage', 0) if algo_results.get("rsa") else 0
-        
-        ppe_memory.append(ppe_mem / 1024)  # Convert to KB
-        aes_memory.append(aes_mem / 1024)
-        rsa_memory.append(rsa_mem / 1024)
+        for algorithm in algorithms:
+            result = algo_results.get(algorithm)
+            times[algorithm].append(result['total_time'] if result else 0)
+            memory[algorithm].append(result['memory_usage'] / 1024 if result else 0)  # Convert to KB
     
     # Create charts
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
     
     # 1. Execution Time Comparison
     x = np.arange(len(sizes))
-    width = 0.25
+    width = 0.75 / len(algorithms)
+    offsets = {algorithm: (i - (len(algorithms) - 1) / 2) * width for i, algorithm in enumerate(algorithms)}
     
-    ax1.bar(x - width, ppe_times, width, label='PPE', color=colors['ppe'])
-    ax1.bar(x, aes_times, width, label='AES-128', color=colors['aes'])
-    ax1.bar(x + width, rsa_times, width, label='RSA-2048', color=colors['rsa'])
+    for algorithm in algorithms:
+        ax1.bar(x + offsets[algorithm], times[algorithm], width, label=algorithm_names[algorithm], color=colors[algorithm])
     
     ax1.set_title('Execution Time Comparison', fontsize=14, fontweight='bold')
     ax1.set_ylabel('Time (milliseconds)')
@@ -516,9 +505,8 @@ def plot_algorithm_comparison_charts(results):
     ax1.grid(True, alpha=0.3)
     
     # 2. Memory Usage Comparison
-    ax2.bar(x - width, ppe_memory, width, label='PPE', color=colors['ppe'])
-    ax2.bar(x, aes_memory, width, label='AES-128', color=colors['aes'])
-    ax2.bar(x + width, rsa_memory, width, label='RSA-2048', color=colors['rsa'])
+    for algorithm in algorithms:
+        ax2.bar(x + offsets[algorithm], memory[algorithm], width, label=algorithm_names[algorithm], color=colors[algorithm])
     
     ax2.set_title('Memory Usage Comparison', fontsize=14, fontweight='bold')
     ax2.set_ylabel('Memory (Kilobytes)')
@@ -532,11 +520,11 @@ def plot_algorithm_comparison_charts(results):
         first_size = sizes[0]
         first_results = results[first_size]
         
-        max_time = max([first_results.get(algo, {}).get('total_time', 0) for algo in algorithms])
-        max_memory = max([first_results.get(algo, {}).get('memory_usage', 0) for algo in algorithms])
+        max_time = max([(first_results.get(algo) or {}).get('total_time', 0) for algo in algorithms])
+        max_memory = max([(first_results.get(algo) or {}).get('memory_usage', 0) for algo in algorithms])
         
         categories = ['Speed\n(Lower is better)', 'Memory\n(Lower is better)', 'Security\n(Higher is better)']
-        security_scores = [1, 3, 5]  # PPE=1, AES=3, RSA=5
+        security_scores = {"ppe": 1, "aes": 3, "rsa": 5, "ppec": 3}  # PPEC: AES-CBC halves with random IVs
         
         angles = np.linspace(0, 2 * np.pi, len(categories), endpoint=False).tolist()
         angles += angles[:1]
@@ -546,7 +534,7 @@ def plot_algorithm_comparison_charts(results):
                 speed_score = 5 - (first_results[algorithm]['total_time'] / max_time * 4) if max_time > 0 else 5
                 memory_score = 5 - (first_results[algorithm]['memory_usage'] / max_memory * 4) if max_memory > 0 else 5
                 
-                values = [speed_score, memory_score, security_scores[i]]
+                values = [speed_score, memory_score, security_scores[algorithm]]
                 values += values[:1]
                 
                 ax3.plot(angles, values, 'o-', linewidth=2, label=algorithm_names[algorithm], color=colors[algorithm])
@@ -562,6 +550,7 @@ def plot_algorithm_comparison_charts(results):
     # 4. Throughput Comparison
     throughput_data = []
     throughput_labels = []
+    throughput_colors = []
     
     for size_name, algo_results in results.items():
         data_size = len(size_name.split('(')[1].split(')')[0].replace('B', '').replace('KB', '000'))
@@ -574,8 +563,9 @@ def plot_algorithm_comparison_charts(results):
                 throughput = data_size / time_sec if time_sec > 0 else 0
                 throughput_data.append(throughput)
                 throughput_labels.append(f"{algorithm.upper()}\n{size_name}")
+                throughput_colors.append(colors[algorithm])
     
-    bars = ax4.bar(throughput_labels, throughput_data, color=[colors[algo] for algo in algorithms * len(results)])
+    bars = ax4.bar(throughput_labels, throughput_data, color=throughput_colors)
     ax4.set_title('Throughput Comparison', fontsize=14, fontweight='bold')
     ax4.set_ylabel('Bytes per Second')
     ax4.tick_params(axis='x', rotation=45)
@@ -604,8 +594,8 @@ def print_algorithm_analysis(results):
     print("🎯 ESP32 ALGORITHM COMPARISON ANALYSIS")
     print("="*70)
     
-    algorithms = ["ppe", "aes", "rsa"]
-    algorithm_names = {"ppe": "PPE", "aes": "AES-128", "rsa": "RSA-2048"}
+    algorithms = result_algorithms(results)
+    algorithm_names = ALGORITHM_NAMES
     
     print("\n📊 ALGORITHM PERFORMANCE SUMMARY:")
     print("-" * 50)
@@ -637,7 +627,7 @@ def print_algorithm_analysis(results):
                     print(f"   ✅ Excellent for ESP32 - Fast and efficient")
                 else:
                     print(f"   ⚠️  Acceptable but could be optimized")
-            elif algorithm == "aes":
+            elif algorithm in ("aes", "ppec"):
                 if avg_time < 500:
                     print(f"   ✅ Good balance of security and performance")
                 else:
@@ -679,7 +669,7 @@ def print_detailed_comparison_table(results):
     print("-" * 100)
     
     for size_name, algo_results in results.items():
-        for algorithm in ["ppe", "aes", "rsa"]:
+        for algorithm in result_algorithms(results):
             if algo_results.get(algorithm):
                 result = algo_results[algorithm]
                 print(f"{size_name:<20} {algorithm.upper():<15} {result['total_time']:<20.1f} {result['memory_usage']:<20,.0f} {result['success_rate']:<15.0f}%")
@@ -690,8 +680,8 @@ def print_detailed_comparison_table(results):
     print(f"{'Algorithm':<15} {'Avg Time (ms)':<20} {'Avg Memory (bytes)':<25} {'Performance Rating':<25} {'ESP32 Suitability':<20}")
     print("-" * 100)
     
-    algorithms = ["ppe", "aes", "rsa"]
-    algorithm_names = {"ppe": "PPE", "aes": "AES-128", "rsa": "RSA-2048"}
+    algorithms = result_algorithms(results)
+    algorithm_names = ALGORITHM_NAMES
     
     for algorithm in algorithms:
         total_times = []
@@ -725,17 +715,16 @@ def print_detailed_comparison_table(results):
     # Table 3: Memory Efficiency Analysis
     print("\n\n📊 Table 3: Memory Efficiency Analysis")
     print("-" * 100)
-    print(f"{'Data Size':<20} {'PPE (KB)':<15} {'AES (KB)':<15} {'RSA (KB)':<15} {'Memory Ratio':<20}")
+    print(f"{'Data Size':<20} " + "".join(f"{algorithm.upper() + ' (KB)':<15} " for algorithm in algorithms) + f"{'Memory Ratio':<20}")
     print("-" * 100)
     
     for size_name, algo_results in results.items():
-        ppe_mem = algo_results.get("ppe", {}).get('memory_usage', 0) / 1024 if algo_results.get("ppe") else 0
-        aes_mem = algo_results.get("aes", {}).get('memory_usage', 0) / 1024 if algo_results.get("aes") else 0
-        rsa_mem = algo_results.get("rsa", {}).get('memory_usage', 0) / 1024 if algo_results.get("rsa") else 0
+        mems = {algorithm: algo_results[algorithm]['memory_usage'] / 1024 if algo_results.get(algorithm) else 0
+                for algorithm in algorithms}
         
-        if ppe_mem > 0:
-            ratio = f"PPE:{ppe_mem:.1f} | AES:{aes_mem:.1f} | RSA:{rsa_mem:.1f}"
-            print(f"{size_name:<20} {ppe_mem:<15.1f} {aes_mem:<15.1f} {rsa_mem:<15.1f} {ratio:<20}")
+        if mems.get("ppe", 0) > 0:
+            ratio = " | ".join(f"{algorithm.upper()}:{mems[algorithm]:.1f}" for algorithm in algorithms)
+            print(f"{size_name:<20} " + "".join(f"{mems[algorithm]:<15.1f} " for algorithm in algorithms) + f"{ratio:<20}")
     
     # Table 4: Speed vs Security Trade-off
     print("\n\n📊 Table 4: Speed vs Security Trade-off Analysis")
@@ -764,8 +753,8 @@ def print_detailed_comparison_table(results):
             memory_score = 5 - (avg_memory / max_memory * 4) if max_memory > 0 else 5
             
             # Security levels
-            security_levels = {"ppe": "Basic", "aes": "High", "rsa": "Very High"}
-            security_score = {"ppe": 2, "aes": 4, "rsa": 5}[algorithm]
+            security_levels = {"ppe": "Basic", "aes": "High", "rsa": "Very High", "ppec": "High"}
+            security_score = {"ppe": 2, "aes": 4, "rsa": 5, "ppec": 4}[algorithm]
             
             overall = (speed_score + memory_score + security_score) / 3
             
@@ -780,9 +769,13 @@ if __name__ == "__main__":
     print("This will compare PPE, AES, and RSA algorithms on ESP32")
     print()
     
-    # Run benchmark
+    # Run benchmark, or load the measurements of a real board (ppe_bench output captured over serial)
     try:
-        results = esp32_algorithm_benchmark()
+        if len(sys.argv) > 1:
+            from esp32_bench_results import load_results
+            results = load_results(sys.argv[1])
+        else:
+            results = esp32_algorithm_benchmark()
         
         if results:
             print_algorithm_analysis(results)
@@ -0,0 +1,118 @@
+import sys
+
+
+# Loads the CSV that Python - ESP/PPE/ppe_bench.py prints over serial (the captured console
+# output, other lines are skipped) into the results of Final_2_Chart_esp32_algorithm_comparison_english.py:
+#
+#   results[size_name][algorithm] = {'encrypt_time', 'decrypt_time', 'key_gen_time', 'total_time' (ms),
+#                                    'memory_usage' (bytes), 'success_rate' (%)}
+#
+# so the charts and tables show measurements of a real board instead of simulated ones.
+CSV_HEADER = "case,size,run,time_us,mem_free_delta,peak_bytes,ok"
+
+# Device case -> (algorithm, result field)
+CASES = {
+    'PPE': ('ppe', 'encrypt_time'),
+    'PPD': ('ppe', 'decrypt_time'),
+    'AES_encrypt': ('aes', 'encrypt_time'),
+    'AES_decrypt': ('aes', 'decrypt_time'),
+    'PPEC_encrypt': ('ppec', 'encrypt_time'),
+    'PPEC_decrypt': ('ppec', 'decrypt_time'),
+}
+
+# Key derivation cases, measured once (size 0) and counted in the key_gen_time of every size
+KEY_CASES = {
+    'key': ('ppe', 'aes'),
+    'PPEC_key': ('ppec',),
+}
+
+
+# Rows of the benchmark output as dicts, from a path or an iterable of lines
+def read_rows(source):
+    if isinstance(source, str):
+        with open(source) as f:
+            return read_rows(f.read().splitlines())
+
+    names = CSV_HEADER.split(",")
+    rows = []
+    in_table = False
+    for line in source:
+        line = line.strip()
+        if line == CSV_HEADER:
+            in_table = True
+            continue
+        fields = line.split(",")
+        if not in_table or len(fields) != len(names):
+            continue
+        try:
+            values = [fields[0]] + [int(value) for value in fields[1:]]
+        except ValueError:
+            continue
+        rows.append(dict(zip(names, values)))
+    return rows
+
+
+# Chart label of a payload size, "(...B)" or "(...KB)" as the chart code parses it
+def size_name(size):
+    if size >= 1024:
+        return "ESP32 (%gKB)" % (size / 1024)
+    return "ESP32 (%dB)" % size
+
+
+def mean(values):
+    return sum(values) / len(values) if values else 0
+
+
+def load_results(source):
+    rows = read_rows(source)
+
+    key_times = {}
+    runs = {}
+    for row in rows:
+        if row['case'] in KEY_CASES:
+            for algorithm in KEY_CASES[row['case']]:
+                key_times.setdefault(algorithm, []).append(row)
+        elif row['case'] in CASES:
+            algorithm, field = CASES[row['case']]
+            runs.setdefault((row['size'], algorithm), {}).setdefault(field, []).append(row)
+
+    results = {}
+    for size, algorithm in sorted(runs):
+        fields = runs[(size, algorithm)]
+        measured = [row for field_rows in fields.values() for row in field_rows]
+        ok_times = {field: [row['time_us'] / 1000 for row in field_rows if row['ok']]
+                    for field, field_rows in fields.items()}
+
+        results.setdefault(size_name(size), {})
+        # Like the simulation: no result when one direction never worked
+        if not ok_times.get('encrypt_time') or not ok_times.get('decrypt_time'):
+            results[size_name(size)][algorithm] = None
+            continue
+
+        encrypt_time = mean(ok_times['encrypt_time'])
+        decrypt_time = mean(ok_times['decrypt_time'])
+        key_gen_time = mean([row['time_us'] / 1000 for row in key_times.get(algorithm, []) if row['ok']])
+        results[size_name(size)][algorithm] = {
+            'encrypt_time': encrypt_time,
+            'decrypt_time': decrypt_time,
+            'key_gen_time': key_gen_time,
+            'total_time': encrypt_time + decrypt_time + key_gen_time,
+            'memory_usage': max(mean([row['peak_bytes'] for row in field_rows if row['ok']])
+                                for field_rows in fields.values()),
+            'success_rate': sum(row['ok'] for row in measured) / len(measured) * 100,
+        }
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("usage: python esp32_bench_results.py <captured ppe_bench output>")
+        sys.exit(2)
+
+    for size, algo_results in load_results(sys.argv[1]).items():
+        for algorithm, result in algo_results.items():
+            if result is None:
+                print(f"{size:<16} {algorithm.upper():<6} failed")
+            else:
+                print(f"{size:<16} {algorithm.upper():<6} total {result['total_time']:9.2f} ms  "
+                      f"memory {result['memory_usage']:9,.0f} bytes  success {result['success_rate']:.0f}%")
@@ -1,4 +1,8 @@
-import network
+# No network module on the unix port, copied there as ppec.py for ppe_bench
+try:
+    import network
+except ImportError:
+    network = None
 import time
 import ucryptolib
 import ubinascii
@@ -31,13 +35,31 @@ def connect_wifi(ssid, password):
     else:
         print('Failed to connect')
 
-connect_wifi('Reza', '----')
-
 # --------------------------------------------------Key generation functions---------------------------------------------#
-import urequests
+# Only get_http_time needs it, the unix port may not have it
+try:
+    import urequests
+except ImportError:
+    urequests = None
 import json
+# sntp.py of Python - ESP/PPE, copied next to this script: SNTP first, the HTTP API is only the fallback
+import sntp
+rtc_synced = False
 
 def get_unix_time():
+    """Returns the RTC time once synced, else asks SNTP, else the HTTP API."""
+    global rtc_synced
+    if rtc_synced:
+        return sntp.rtc_unix_time()
+
+    try:
+        unix_time = sntp.query()
+    except OSError:
+        return get_http_time()
+    rtc_synced = sntp.set_rtc(unix_time)
+    return unix_time
+
+def get_http_time():
     """Fetches the current Unix time from an external server."""
     try:
         response = urequests.get("https://worldtimeapi.org/api/timezone/asia/tehran")
@@ -240,11 +262,14 @@ def parallel_process_decrypt(encrypted_data, salt):
 
 # --------------------------------------------------Execution---------------------------------------------#
 
-input_text = "Hello world my name is rezafta,"
-salt = "reza"
+if __name__ == '__main__':
+    connect_wifi('Reza', '----')
+
+    input_text = "Hello world my name is rezafta,"
+    salt = "reza"
 
-enc1 = parallel_process_encrypt(input_text, salt)
-dec1 = parallel_process_decrypt(enc1, salt)
+    enc1 = parallel_process_encrypt(input_text, salt)
+    dec1 = parallel_process_decrypt(enc1, salt)
 
-print("Encrypted text is:", enc1)
-print("Decrypted text is:", dec1)
\ No newline at end of file
+    print("Encrypted text is:", enc1)
+    print("Decrypted text is:", dec1)
\ No newline at end of file
@@ -1,6 +1,6 @@
-from Crypto.Cipher import ChaCha20
-from Crypto.Random import get_random_bytes
+from backends import get_backend
 import base64
+import os
 import time
 import re
 import multiprocessing as mp
@@ -104,8 +104,8 @@ def single_core_encrypt(data, key_str):
     key = key_str[0:32]  # ChaCha20 uses 32-byte keys
     
     # Generate a random 12-byte nonce for ChaCha20
-    nonce = get_random_bytes(12)
-    cipher = ChaCha20.new(key=key.encode('utf-8'), nonce=nonce)
+    nonce = os.urandom(12)
+    cipher = get_backend('chacha20').chacha20(key.encode('utf-8'), nonce)
     ct_bytes = cipher.encrypt(data.encode('utf-8'))
     
     # Combine nonce and ciphertext, then encode
@@ -125,7 +125,7 @@ def single_core_decrypt(enc_data, key_str):
     nonce = combined[:12]
     ct_bytes = combined[12:]
     
-    cipher = ChaCha20.new(key=key.encode('utf-8'), nonce=nonce)
+    cipher = get_backend('chacha20').chacha20(key.encode('utf-8'), nonce)
     pt = cipher.decrypt(ct_bytes)
     return pt.decode('utf-8')
 
@@ -0,0 +1,176 @@
+import os
+import sys
+import threading
+from importlib.util import find_spec
+from time import perf_counter_ns
+
+
+# ChaCha20 backends: pycryptodome (Crypto.Cipher) and cryptography (OpenSSL).
+#
+# Both hand out ciphers with the pycryptodome calling convention:
+#   chacha20(key, nonce) -> encrypt(data, output=None) / decrypt(data, output=None),
+#                           a 12 byte RFC 7539 nonce, counter from 0
+#
+# The backend is chosen on first use: PPEC_BACKEND (or set_backend) when given, else the
+# result of an earlier micro-benchmark cached in PPEC_BACKEND_CACHE (~/.cache/ppec/backend.json),
+# else a fresh micro-benchmark of every installed backend. PPE (AES) keeps its own choice and cache.
+ENV_BACKEND = "PPEC_BACKEND"
+ENV_CACHE = "PPEC_BACKEND_CACHE"
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "ppec", "backend.json")
+
+ALGORITHMS = ('chacha20',)
+
+
+class PyCryptodomeBackend:
+    name = 'pycryptodome'
+    module = 'Crypto'
+
+    def version(self):
+        import Crypto
+        return Crypto.__version__
+
+    def chacha20(self, key, nonce):
+        from Crypto.Cipher import ChaCha20
+        return ChaCha20.new(key=key, nonce=nonce)
+
+
+class _OpenSSLStreamCipher:
+    __slots__ = ('_context',)
+
+    # A stream context is never finalized and encrypts and decrypts alike
+    def __init__(self, cipher):
+        self._context = cipher.encryptor()
+
+    def encrypt(self, data, output=None):
+        if output is None:
+            return self._context.update(data)
+        self._context.update_into(data, output)
+
+    decrypt = encrypt
+
+
+class CryptographyBackend:
+    name = 'cryptography'
+    module = 'cryptography'
+
+    def version(self):
+        import cryptography
+        return cryptography.__version__
+
+    def chacha20(self, key, nonce):
+        from cryptography.hazmat.primitives.ciphers import Cipher, algorithms
+        # OpenSSL takes the 4 byte little-endian block counter in front of the 12 byte nonce
+        if len(nonce) == 12:
+            nonce = bytes(4) + bytes(nonce)
+        return _OpenSSLStreamCipher(Cipher(algorithms.ChaCha20(key, nonce), mode=None))
+
+
+BACKENDS = {backend.name: backend for backend in (PyCryptodomeBackend(), CryptographyBackend())}
+
+_selected = {}
+_lock = threading.Lock()
+
+
+def available_backends():
+    return [name for name, backend in BACKENDS.items() if find_spec(backend.module) is not None]
+
+
+# Force a backend for one algorithm (or all of them with algorithm=None), None goes back to auto-selection
+def set_backend(name, algorithm=None):
+    if name is not None and name not in BACKENDS:
+        raise ValueError("unknown cipher backend %r, expected one of %s" % (name, ", ".join(BACKENDS)))
+
+    with _lock:
+        for algo in ALGORITHMS if algorithm is None else (algorithm,):
+            if name is None:
+                _selected.pop(algo, None)
+            else:
+                _selected[algo] = BACKENDS[name]
+
+
+def get_backend(algorithm='chacha20'):
+    backend = _selected.get(algorithm)
+    if backend is not None:
+        return backend
+
+    with _lock:
+        backend = _selected.get(algorithm)
+        if backend is None:
+            backend = _selected[algorithm] = BACKENDS[select_backend(algorithm)]
+    return backend
+
+
+# Name of the backend to use for algorithm on this machine
+def select_backend(algorithm='chacha20'):
+    installed = available_backends()
+    if not installed:
+        raise ImportError("no cipher backend installed, install pycryptodome or cryptography")
+
+    override = os.environ.get(ENV_BACKEND)
+    if override:
+        if override not in installed:
+            raise ValueError("%s=%s but that backend is not installed" % (ENV_BACKEND, override))
+        return override
+    if len(installed) == 1:
+        return installed[0]
+
+    cache_path = os.environ.get(ENV_CACHE, DEFAULT_CACHE)
+    fingerprint = _fingerprint(installed)
+    cached = _read_cache(cache_path)
+    if cached.get('fingerprint') == fingerprint and cached.get(algorithm) in installed:
+        return cached[algorithm]
+
+    results = benchmark_backends(algorithm, installed)
+    name = max(results, key=results.get)
+    cached = cached if cached.get('fingerprint') == fingerprint else {'fingerprint': fingerprint}
+    cached[algorithm] = name
+    cached[algorithm + '_mb_per_s'] = results
+    _write_cache(cache_path, cached)
+    return name
+
+
+# Throughput (MB/s) of every backend on size bytes, best of rounds
+def benchmark_backends(algorithm='chacha20', names=None, size=64 * 1024, rounds=10):
+    key = bytes(range(32))
+    data = bytes(size)
+    results = {}
+    for name in names or available_backends():
+        backend = BACKENDS[name]
+        best = None
+        for _ in range(rounds):
+            start = perf_counter_ns()
+            backend.chacha20(key, bytes(12)).encrypt(data)
+            elapsed = perf_counter_ns() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = size / 1e6 / (max(best, 1) / 1e9)
+    return results
+
+
+# A cached choice only holds for the same interpreter, CPU and library versions
+def _fingerprint(installed):
+    import platform
+
+    return "%s|%s|%s|%s" % (sys.version.split()[0], platform.machine(), platform.processor(),
+                            ",".join("%s=%s" % (name, BACKENDS[name].version()) for name in installed))
+
+
+def _read_cache(path):
+    import json
+
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+        return cached if isinstance(cached, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(path, cached):
+    import json
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(cached, f, indent=2)
+    except OSError:
+        pass